@@ -1,167 +1,1566 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, g, has_request_context
 from flask_cors import CORS
 from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from functools import partial
 import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
 import psycopg2.extras
 import bcrypt
+import atexit
+import base64
+import click
+import csv
+import fcntl
 import os
+import gzip
+import hashlib
+import hmac
+import heapq
+import io
 import json
+import random
+import secrets
+import threading
+import time
 import traceback
 
-app = Flask(__name__)
-CORS(app)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# 모듈 로딩 시작 시각 (create_app에서 기동 시간 보고에 사용)
+_IMPORT_STARTED = time.perf_counter()
+
+# 라우트는 블루프린트에 모아 두고 create_app()에서 등록한다 (임포트 시 DB 작업 없음)
+bp = Blueprint('quiz', __name__, cli_group=None)
 
 # 환경 변수에서 데이터베이스 접속 정보 가져오기
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+# 커넥션 풀 설정 (gunicorn 워커 프로세스마다 별도의 풀이 만들어지므로 워커 단위 크기)
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', '1'))
+# 기본값은 워커당 요청 스레드 수 (gunicorn.conf.py가 설정하지 않았으면 GUNICORN_THREADS 기본값과 같은 8)
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', os.environ.get('GUNICORN_THREADS', '8')))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))                    # 커넥션 대기 최대 시간(초)
+DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', '300'))                 # 이 시간 이상 놀고 있는 커넥션은 정리
+DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600'))        # 커넥션 최대 수명
+DB_POOL_HEALTHCHECK_IDLE = float(os.environ.get('DB_POOL_HEALTHCHECK_IDLE', '30'))  # 이 시간 이상 쉰 커넥션은 꺼내기 전에 SELECT 1 확인
+DB_SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', '200'))
+DB_METRICS_MAX_QUERIES = int(os.environ.get('DB_METRICS_MAX_QUERIES', '200'))  # 넘으면 새 쿼리는 '(other)'로 합산
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# --- DB 지표 수집 (쿼리별 실행 시간, 풀 대기 시간) ---
+class DBMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.queries = {}
+            self.pool_wait = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'timeouts': 0}
+            self.pool_events = {'opened': 0, 'recycled_idle': 0, 'recycled_lifetime': 0, 'discarded_broken': 0, 'health_check_failed': 0}
+
+    @staticmethod
+    def _add(stat, elapsed_ms):
+        stat['count'] += 1
+        stat['total_ms'] += elapsed_ms
+        stat['max_ms'] = max(stat['max_ms'], elapsed_ms)
+
+    def record_query(self, query, elapsed_ms):
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', 'replace')
+        key = ' '.join(str(query).split())[:160]
+        with self._lock:
+            if key not in self.queries and len(self.queries) >= DB_METRICS_MAX_QUERIES:
+                key = '(other)'
+            stat = self.queries.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            self._add(stat, elapsed_ms)
+        if has_request_context():
+            g.db_query_count = g.get('db_query_count', 0) + 1
+            g.db_query_ms = g.get('db_query_ms', 0.0) + elapsed_ms
+        if elapsed_ms >= DB_SLOW_QUERY_MS:
+            print(f"Slow query ({elapsed_ms:.1f}ms): {key}")
+
+    def record_pool_wait(self, elapsed_ms, timed_out=False):
+        with self._lock:
+            self._add(self.pool_wait, elapsed_ms)
+            if timed_out:
+                self.pool_wait['timeouts'] += 1
+        if has_request_context():
+            g.db_pool_wait_ms = g.get('db_pool_wait_ms', 0.0) + elapsed_ms
+
+    def record_event(self, name, count=1):
+        with self._lock:
+            self.pool_events[name] += count
+
+    def snapshot(self):
+        with self._lock:
+            queries = sorted(
+                ({'query': q, **s, 'avg_ms': s['total_ms'] / s['count']} for q, s in self.queries.items()),
+                key=lambda s: s['total_ms'], reverse=True
+            )
+            pool_wait = dict(self.pool_wait)
+            pool_wait['avg_ms'] = pool_wait['total_ms'] / pool_wait['count'] if pool_wait['count'] else 0.0
+            return {'queries': queries, 'pool_wait': pool_wait, 'pool_events': dict(self.pool_events)}
+
+
+db_metrics = DBMetrics()
+
+
+class _TimedCursorMixin:
+    metrics_label = None  # 설정되어 있으면 실행한 SQL 대신 이 이름으로 기록
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            db_metrics.record_query(self.metrics_label or query, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            db_metrics.record_query(query, (time.perf_counter() - start) * 1000)
+
+
+_timed_cursor_classes = {}
+
+def _timed_cursor_class(base):
+    if issubclass(base, _TimedCursorMixin):
+        return base
+    timed = _timed_cursor_classes.get(base)
+    if timed is None:
+        timed = type('Timed' + base.__name__, (_TimedCursorMixin, base), {})
+        _timed_cursor_classes[base] = timed
+    return timed
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    # 어떤 cursor_factory를 쓰더라도 실행 시간이 기록되도록 감싼다
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _timed_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+
+def execute_values(cursor, sql, argslist, **kwargs):
+    # psycopg2의 execute_values는 값을 채워 넣은 SQL을 실행하므로, 지표에는 값(이메일, 점수 등)이
+    # 들어가지 않도록 %s 자리표시자가 남아 있는 원래 문장으로 기록한다
+    if not isinstance(cursor, _TimedCursorMixin):
+        return psycopg2.extras.execute_values(cursor, sql, argslist, **kwargs)
+    cursor.metrics_label = sql
+    try:
+        return psycopg2.extras.execute_values(cursor, sql, argslist, **kwargs)
+    finally:
+        cursor.metrics_label = None
+
+
+# --- 커넥션 풀 ---
+class ConnectionPool:
+    def __init__(self, dsn, minconn, maxconn):
+        self._dsn = dsn
+        self._minconn = minconn
+        self._maxconn = max(maxconn, 1)
+        self._cond = threading.Condition()
+        self._idle = []  # 반납된 커넥션 (LIFO로 꺼내서 자주 쓰는 커넥션만 살아있도록)
+        self._size = 0   # 현재 열려 있거나 여는 중인 커넥션 수
+
+    def _connect(self):
+        conn = psycopg2.connect(self._dsn, connection_factory=InstrumentedConnection)
+        conn.created_at = conn.last_used_at = time.monotonic()
+        db_metrics.record_event('opened')
+        return conn
+
+    def _open_in_slot(self):
+        # 슬롯(_size)은 이미 확보된 상태에서 호출됨
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _prune_idle_locked(self, now):
+        # 오래 놀고 있거나 수명이 다한 커넥션을 골라낸다 (최소 개수는 유지)
+        expired = []
+        for conn in list(self._idle):
+            if now - conn.created_at > DB_POOL_MAX_LIFETIME:
+                db_metrics.record_event('recycled_lifetime')
+            elif now - conn.last_used_at > DB_POOL_MAX_IDLE and self._size - len(expired) > self._minconn:
+                db_metrics.record_event('recycled_idle')
+            else:
+                continue
+            self._idle.remove(conn)
+            expired.append(conn)
+        self._size -= len(expired)
+        if expired:
+            self._cond.notify(len(expired))
+        return expired
+
+    def _is_healthy(self, conn, now):
+        if conn.closed:
+            return False
+        if now - conn.last_used_at < DB_POOL_HEALTHCHECK_IDLE:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            db_metrics.record_event('health_check_failed')
+            return False
+
+    def getconn(self):
+        start = time.perf_counter()
+        deadline = start + DB_POOL_TIMEOUT
+        conn = None
+        expired = []
+        try:
+            with self._cond:
+                while True:
+                    expired += self._prune_idle_locked(time.monotonic())
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if self._size < self._maxconn:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        db_metrics.record_pool_wait((time.perf_counter() - start) * 1000, timed_out=True)
+                        raise PoolTimeout(f"No database connection available within {DB_POOL_TIMEOUT}s")
+                    self._cond.wait(remaining)
+        finally:
+            for old in expired:
+                self._close_quietly(old)
+        db_metrics.record_pool_wait((time.perf_counter() - start) * 1000)
+
+        if conn is None:
+            return self._open_in_slot()
+        if not self._is_healthy(conn, time.monotonic()):
+            # 끊어진 커넥션은 같은 슬롯에서 새로 연결
+            db_metrics.record_event('discarded_broken')
+            self._close_quietly(conn)
+            return self._open_in_slot()
+        return conn
+
+    def putconn(self, conn, broken=False):
+        if not broken and not conn.closed:
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                broken = True
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+        broken = broken or bool(conn.closed)
+        with self._cond:
+            if broken:
+                self._size -= 1
+                db_metrics.record_event('discarded_broken')
+            else:
+                conn.last_used_at = time.monotonic()
+                self._idle.append(conn)
+            expired = self._prune_idle_locked(time.monotonic())
+            self._cond.notify()
+        if broken:
+            self._close_quietly(conn)
+        for old in expired:
+            self._close_quietly(old)
+
+    def stats(self):
+        with self._cond:
+            return {'size': self._size, 'idle': len(self._idle), 'in_use': self._size - len(self._idle),
+                    'min': self._minconn, 'max': self._maxconn}
+
+    def closeall(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    # fork 이후 부모 프로세스의 커넥션을 공유하지 않도록 프로세스마다 풀을 새로 만든다
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool(DATABASE_URL, DB_POOL_MIN, DB_POOL_MAX)
+                _pool_pid = pid
+    return _pool
+
 # --- 데이터베이스 연결 함수 ---
+# 풀에서 커넥션을 빌려 주고, 블록이 끝나면 commit/rollback 후 반납한다
+@contextmanager
 def get_db_connection():
-    conn = psycopg2.connect(DATABASE_URL)
-    return conn
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    except BaseException:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
+    finally:
+        pool.putconn(conn, broken=broken)
+
+@bp.after_app_request
+def add_db_timing_header(response):
+    if 'db_query_count' in g or 'db_pool_wait_ms' in g:
+        response.headers['Server-Timing'] = (
+            f"db;desc=\"{g.get('db_query_count', 0)} queries\";dur={g.get('db_query_ms', 0.0):.1f}, "
+            f"db-wait;dur={g.get('db_pool_wait_ms', 0.0):.1f}"
+        )
+    return response
+
+# --- 스키마 마이그레이션 ---
+# 배포마다 한 번 'flask --app app migrate'로 실행한다 (워커 기동 시에는 DB 작업을 하지 않음)
+def _migrate_base_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS parts (
+            id SERIAL PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS questions (
+            id SERIAL PRIMARY KEY,
+            part_id INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            options TEXT NOT NULL,
+            answer INTEGER NOT NULL,
+            topic TEXT NOT NULL,
+            explanation TEXT,
+            display_order INTEGER NOT NULL,
+            FOREIGN KEY (part_id) REFERENCES parts (id) ON DELETE CASCADE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            signup_date DATE NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quiz_history (
+            id SERIAL PRIMARY KEY,
+            user_email TEXT NOT NULL,
+            date TIMESTAMP NOT NULL,
+            score INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            part TEXT NOT NULL
+        )
+    ''')
+
+def _migrate_bank_version(cursor):
+    # 문제 은행 버전: questions/parts가 바뀔 때마다 트리거로 1씩 증가 (워커별 캐시 무효화 기준)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bank_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version BIGINT NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT INTO bank_version (id, version) VALUES (1, 1) ON CONFLICT (id) DO NOTHING")
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION bump_bank_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE bank_version SET version = version + 1 WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    ''')
+    for table in ('parts', 'questions'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_bump_bank_version ON {table}")
+        cursor.execute(f'''
+            CREATE TRIGGER {table}_bump_bank_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE PROCEDURE bump_bank_version()
+        ''')
+
+def _migrate_history_stats(cursor):
+    # 사용자별 기록 조회(최신순 커서 페이지네이션)용 인덱스
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_quiz_history_user_date
+        ON quiz_history (user_email, date DESC, id DESC)
+    ''')
+    # 사용자·파트별 누적 성적 (quiz_history 저장 시 같은 트랜잭션에서 갱신)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_part_stats (
+            user_email TEXT NOT NULL,
+            part TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            score_sum BIGINT NOT NULL,
+            total_sum BIGINT NOT NULL,
+            pct_sum DOUBLE PRECISION NOT NULL,
+            best_pct DOUBLE PRECISION NOT NULL,
+            last_pct DOUBLE PRECISION NOT NULL,
+            last_date TIMESTAMP NOT NULL,
+            recent_pcts DOUBLE PRECISION[] NOT NULL,
+            PRIMARY KEY (user_email, part)
+        )
+    ''')
+    # 기존 기록이 있는데 집계 테이블이 비어 있으면 한 번만 채운다
+    cursor.execute('''
+        INSERT INTO user_part_stats
+            (user_email, part, attempts, score_sum, total_sum, pct_sum, best_pct, last_pct, last_date, recent_pcts)
+        SELECT user_email, part, COUNT(*), SUM(score), SUM(total), SUM(pct), MAX(pct),
+               (array_agg(pct ORDER BY date DESC, id DESC))[1], MAX(date),
+               (array_agg(pct ORDER BY date DESC, id DESC))[1:%s]
+        FROM (
+            SELECT id, user_email, part, date, score, total,
+                   CASE WHEN total > 0 THEN score * 100.0 / total ELSE 0 END AS pct
+            FROM quiz_history
+        ) h
+        WHERE NOT EXISTS (SELECT 1 FROM user_part_stats)
+        GROUP BY user_email, part
+        ON CONFLICT (user_email, part) DO NOTHING
+    ''', (HISTORY_RECENT_LIMIT,))
+
+def _migrate_topic_stats(cursor):
+    # 응시별 주제 결과 {주제: [맞은 수, 문제 수]}
+    cursor.execute("ALTER TABLE quiz_history ADD COLUMN IF NOT EXISTS topic_results JSONB")
+    # 주제/문제별 정답률 누적 (quiz_history 저장 시 같은 트랜잭션에서 갱신)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_topic_stats (
+            user_email TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            correct BIGINT NOT NULL,
+            total BIGINT NOT NULL,
+            PRIMARY KEY (user_email, topic)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_stats (
+            topic TEXT PRIMARY KEY,
+            correct BIGINT NOT NULL,
+            total BIGINT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS question_stats (
+            question_id INTEGER PRIMARY KEY,
+            correct BIGINT NOT NULL,
+            total BIGINT NOT NULL
+        )
+    ''')
+
+def _migrate_question_state(cursor):
+    # 사용자별 문제 복습 상태 (간격 반복 스케줄)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_question_state (
+            user_email TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            attempts INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            streak INTEGER NOT NULL,
+            interval_hours DOUBLE PRECISION NOT NULL,
+            due_at TIMESTAMP NOT NULL,
+            last_seen TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_email, question_id)
+        )
+    ''')
 
-# --- 데이터베이스 테이블 생성 함수 ---
-def init_db():
+def _migrate_question_key(cursor):
+    # 일괄 가져오기에서 upsert 기준이 되는 문제 고유 키 (기본값: 파트명 + 문제 본문의 md5)
+    cursor.execute("ALTER TABLE questions ADD COLUMN IF NOT EXISTS question_key TEXT")
+    cursor.execute('''
+        UPDATE questions q SET question_key = md5(p.name || E'\\n' || q.question)
+        FROM parts p
+        WHERE q.part_id = p.id AND q.question_key IS NULL
+    ''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_key ON questions (question_key)")
+
+def _migrate_recent_dates(cursor):
+    # 최근 점수마다 응시 시각을 함께 저장해, 나중에 다시 넣은 예전 기록도 날짜 순서대로 합친다
+    cursor.execute("ALTER TABLE user_part_stats ADD COLUMN IF NOT EXISTS recent_dates TIMESTAMP[]")
+    cursor.execute('''
+        UPDATE user_part_stats s SET (recent_pcts, recent_dates) = (
+            SELECT COALESCE(array_agg(pct ORDER BY date DESC, id DESC), '{}'),
+                   COALESCE(array_agg(date ORDER BY date DESC, id DESC), '{}')
+            FROM (
+                SELECT id, date, CASE WHEN total > 0 THEN score * 100.0 / total ELSE 0 END AS pct
+                FROM quiz_history h
+                WHERE h.user_email = s.user_email AND h.part = s.part
+                ORDER BY date DESC, id DESC
+                LIMIT %s
+            ) recent
+        )
+        WHERE s.recent_dates IS NULL
+    ''', (HISTORY_RECENT_LIMIT,))
+
+def _migrate_quiz_sessions(cursor):
+    # 모든 워커가 함께 보는 퀴즈 세션 (REDIS_URL이 없을 때의 기본 저장소). 답안은 문제당 1바이트
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quiz_sessions (
+            session_id TEXT PRIMARY KEY,
+            meta JSONB NOT NULL,
+            answers BYTEA NOT NULL,
+            result JSONB,
+            expires_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quiz_sessions_expires_at ON quiz_sessions (expires_at)")
+
+MIGRATIONS = [
+    (1, 'base tables', _migrate_base_tables),
+    (2, 'question bank version counter', _migrate_bank_version),
+    (3, 'history index and per-part stats', _migrate_history_stats),
+    (4, 'topic results and accuracy stats', _migrate_topic_stats),
+    (5, 'per-question review state', _migrate_question_state),
+    (6, 'stable question keys', _migrate_question_key),
+    (7, 'dates for recent per-part scores', _migrate_recent_dates),
+    (8, 'shared quiz sessions', _migrate_quiz_sessions),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+MIGRATION_LOCK_ID = 734201  # pg_advisory_xact_lock 키: 동시에 여러 배포가 마이그레이션하지 않도록
+
+def run_migrations():
+    # 아직 적용되지 않은 마이그레이션을 한 트랜잭션으로 적용하고 현재 스키마 버전을 돌려준다
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS parts (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS questions (
-                    id SERIAL PRIMARY KEY,
-                    part_id INTEGER NOT NULL,
-                    question TEXT NOT NULL,
-                    options TEXT NOT NULL,
-                    answer INTEGER NOT NULL,
-                    topic TEXT NOT NULL,
-                    explanation TEXT,
-                    display_order INTEGER NOT NULL,
-                    FOREIGN KEY (part_id) REFERENCES parts (id) ON DELETE CASCADE
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    signup_date DATE NOT NULL
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP NOT NULL
                 )
             ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS quiz_history (
-                    id SERIAL PRIMARY KEY,
-                    user_email TEXT NOT NULL,
-                    date TIMESTAMP NOT NULL,
-                    score INTEGER NOT NULL,
-                    total INTEGER NOT NULL,
-                    part TEXT NOT NULL
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {version for (version,) in cursor.fetchall()}
+            for version, name, migrate in MIGRATIONS:
+                if version in applied:
+                    continue
+                start = time.perf_counter()
+                migrate(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, %s)",
+                    (version, name, datetime.now())
                 )
-            ''')
-        conn.commit()
-        print("Database tables checked/created successfully.")
+                print(f"Applied migration {version} ({name}) in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return SCHEMA_VERSION
 
-# --- 초기 데이터 삽입 함수 ---
-def populate_db_if_empty():
-    initial_quiz_questions = [
-        # Part 1. 비행이론
-        {"id": 1, "part": "Part 1. 비행이론", "question": "항공기가 등속 수평 비행을 할 때, 4가지 힘의 관계로 올바른 것은?", "options": ["양력 > 중력, 추력 > 항력", "양력 = 중력, 추력 = 항력", "양력 < 중력, 추력 < 항력", "양력 = 항력, 추력 = 중력"], "answer": 1, "topic": "비행 원리", "explanation": "등속 수평 비행은 힘의 평형 상태를 의미하며, 수직 방향의 힘(양력과 중력)과 수평 방향의 힘(추력과 항력)이 각각 동일해야 합니다."},
-        {"id": 2, "part": "Part 1. 비행이론", "question": "받음각(Angle of Attack)이 임계점을 초과했을 때 발생하는 현상은?", "options": ["급상승", "실속 (Stall)", "음속 돌파", "자동 선회"], "answer": 1, "topic": "비행 원리", "explanation": "임계 받음각을 초과하면 날개 윗면의 공기 흐름이 분리되어 양력을 급격히 잃는 실속(Stall) 현상이 발생합니다."},
-        {"id": 3, "part": "Part 1. 비행이론", "question": "날개의 캠버(Camber)가 증가하면 어떤 변화가 일어나는가?", "options": ["양력 계수가 감소한다", "양력 계수가 증가한다", "항력이 감소한다", "추력이 증가한다"], "answer": 1, "topic": "비행 원리", "explanation": "캠버는 날개의 휨 정도로, 캠버가 증가하면 날개 위아래의 압력 차이가 커져 더 큰 양력을 발생시킵니다."},
-        {"id": 4, "part": "Part 1. 비행이론", "question": "항공기 자세를 제어하는 3개의 축이 아닌 것은?", "options": ["세로축(Longitudinal Axis)", "가로축(Lateral Axis)", "수직축(Vertical Axis)", "중력축(Gravitational Axis)"], "answer": 3, "topic": "비행 원리", "explanation": "항공기의 3축은 롤링을 제어하는 세로축, 피칭을 제어하는 가로축, 요잉을 제어하는 수직축입니다. 중력축은 항공기 운동의 기준 축이 아닙니다."},
-        {"id": 5, "part": "Part 1. 비행이론", "question": "플랩(Flap)을 내리면 나타나는 주된 효과 두 가지는?", "options": ["양력 증가, 항력 감소", "양력 감소, 항력 증가", "양력 증가, 항력 증가", "양력 감소, 항력 감소"], "answer": 2, "topic": "비행 원리", "explanation": "플랩은 날개의 캠버와 시위 길이를 증가시켜, 특히 저속에서 양력과 항력을 모두 크게 증가시키는 역할을 합니다."},
-        {"id": 6, "part": "Part 1. 비행이론", "question": "항공기의 안정성 중, 요잉(Yawing) 운동에 대한 안정성을 무엇이라고 하는가?", "options": ["세로 안정성", "가로 안정성", "방향 안정성", "동적 안정성"], "answer": 2, "topic": "비행 원리", "explanation": "방향 안정성은 항공기가 옆바람 등으로 인해 요잉(좌우 회전)했을 때, 원래의 비행 방향으로 돌아오려는 성질을 말하며, 주로 수직 안정판에 의해 유지됩니다."},
-        {"id": 7, "part": "Part 1. 비행이론", "question": "프로펠러 항공기에서 발생하는 P-factor는 어떤 비행 상태에서 가장 두드러지는가?", "options": ["고속 수평 비행", "저속, 높은 받음각 상태", "활공 비행", "강하 비행"], "answer": 1, "topic": "비행 원리", "explanation": "P-factor는 프로펠러의 하강 블레이드가 상승 블레이드보다 더 큰 추력을 내는 현상으로, 받음각이 높은 상태(예: 이륙, 상승)에서 가장 두드러지게 나타나 좌측으로 요잉하려는 경향을 만듭니다."},
-        {"id": 8, "part": "Part 1. 비행이론", "question": "항공기 무게가 증가하면 실속 속도는 어떻게 되는가?", "options": ["증가한다", "감소한다", "변화 없다", "무게와 무관하다"], "answer": 0, "topic": "비행 원리", "explanation": "더 무거운 무게를 지탱하기 위해서는 더 큰 양력이 필요하며, 동일한 조건에서 더 큰 양력을 얻으려면 더 빠른 속도가 필요합니다. 따라서 실속 속도가 증가합니다."},
-        {"id": 9, "part": "Part 1. 비행이론", "question": "지면효과(Ground Effect)가 나타나는 고도는 대략 어느 정도인가?", "options": ["날개 길이의 3배 이내", "날개 길이의 1배 이내", "동체 길이의 1배 이내", "꼬리 높이의 1배 이내"], "answer": 1, "topic": "비행 원리", "explanation": "지면효과는 날개가 지면 가까이 비행할 때 날개 끝 와류가 억제되어 유도 항력이 감소하는 현상으로, 보통 날개 길이(Wingspan)와 같거나 그보다 낮은 고도에서 뚜렷하게 나타납니다."},
-        {"id": 10, "part": "Part 1. 비행이론", "question": "하중 계수(Load Factor)가 2G일 때 조종사가 느끼는 무게는?", "options": ["자신의 몸무게와 같다", "자신의 몸무게의 2배", "자신의 몸무게의 절반", "자신의 몸무게의 4배"], "answer": 1, "topic": "비행 원리", "explanation": "하중 계수는 양력과 중력의 비율로, 2G는 항공기와 그 안의 모든 것이 중력의 2배에 해당하는 힘을 받는 상태를 의미합니다."},
-        {"id": 11, "part": "Part 1. 비행이론", "question": "고도가 높아질수록 공기 밀도는 어떻게 변하는가?", "options": ["높아진다", "변화 없다", "낮아진다", "알 수 없다"], "answer": 2, "topic": "공기역학", "explanation": "고도가 높아지면 대기압이 낮아지고 공기 분자의 수가 줄어들어 공기 밀도가 낮아집니다. 이는 엔진 및 공기역학적 성능 저하의 원인이 됩니다."},
-        {"id": 12, "part": "Part 1. 비행이론", "question": "베르누이의 정리에 따르면, 유체의 속도가 증가하면 압력은 어떻게 되는가?", "options": ["증가한다", "감소한다", "일정하다", "속도와 무관하다"], "answer": 1, "topic": "공기역학", "explanation": "베르누이의 정리는 유체의 총 에너지가 보존된다는 원리로, 속도 에너지(동압)가 증가하면 압력 에너지(정압)는 감소해야 합니다. 이것이 양력 발생의 핵심 원리입니다."},
-        {"id": 13, "part": "Part 1. 비행이론", "question": "대기압이 '29.92 inHg'일 때의 대기 상태를 무엇이라고 하는가?", "options": ["고기압 상태", "저기압 상태", "국제 표준 대기 (ISA)", "밀도 고도"], "answer": 2, "topic": "공기역학", "explanation": "국제 표준 대기(ISA)는 항공기 성능 계산의 기준이 되는 가상의 대기 상태로, 해수면 온도 15°C, 기압 29.92 inHg를 기준으로 합니다."},
-        {"id": 14, "part": "Part 1. 비행이론", "question": "유해 항력(Parasite Drag)에 포함되지 않는 것은?", "options": ["형상 항력(Form Drag)", "표면 마찰 항력(Skin Friction Drag)", "간섭 항력(Interference Drag)", "유도 항력(Induced Drag)"], "answer": 3, "topic": "공기역학", "explanation": "유해 항력은 항공기의 형태, 표면, 부품 간 간섭으로 인해 발생하는 항력입니다. 반면 유도 항력은 양력 발생의 부산물로 생기는 항력으로, 별도로 분류됩니다."},
-        {"id": 15, "part": "Part 1. 비행이론", "question": "유도 항력(Induced Drag)은 항공기 속도가 어떻게 될 때 가장 크게 발생하는가?", "options": ["증가할 때", "감소할 때", "일정할 때", "초음속일 때"], "answer": 1, "topic": "공기역학", "explanation": "유도 항력은 양력을 만들기 위해 큰 받음각이 필요한 저속 비행 상태에서 가장 크게 발생합니다. 속도가 증가하면 유도 항력은 감소합니다."},
-        {"id": 16, "part": "Part 1. 비행이론", "question": "날개 끝 와류(Wingtip Vortices)가 가장 강하게 발생하는 조건은?", "options": ["빠르고, 가볍고, 깨끗할 때", "느리고, 무겁고, 플랩을 내렸을 때", "빠르고, 무겁고, 플랩을 올렸을 때", "느리고, 가볍고, 플랩을 올렸을 때"], "answer": 1, "topic": "공기역학", "explanation": "날개 끝 와류는 날개 위아래의 압력 차이가 클 때 강하게 발생합니다. 이는 큰 양력이 필요한 '느리고, 무겁고, 플랩을 내렸을 때'와 같은 조건에서 가장 두드러집니다."},
-        {"id": 17, "part": "Part 1. 비행이론", "question": "밀도 고도(Density Altitude)가 증가하면 항공기 성능은 어떻게 되는가?", "options": ["향상된다", "저하된다", "변화 없다", "예측할 수 없다"], "answer": 1, "topic": "공기역학", "explanation": "밀도 고도 증가는 공기 밀도 감소를 의미합니다. 공기가 희박해지면 엔진 출력이 감소하고, 프로펠러와 날개의 효율이 떨어져 이륙 거리 증가, 상승률 감소 등 전반적인 성능이 저하됩니다."},
-        {"id": 18, "part": "Part 1. 비행이론", "question": "마하수(Mach Number)는 무엇과 무엇의 비율인가?", "options": ["항공기 속도와 바람의 속도", "항공기 속도와 음속", "추력과 항력의 비율", "양력과 중력의 비율"], "answer": 1, "topic": "공기역학", "explanation": "마하수는 항공기의 실제 속도(TAS)를 해당 고도의 음속으로 나눈 값으로, 고속 비행에서 공기의 압축성 효과를 나타내는 중요한 지표입니다."},
-        {"id": 19, "part": "Part 1. 비행이론", "question": "후퇴각(Sweptback Wing) 날개의 주된 장점은 무엇인가?", "options": ["저속 안정성 증가", "임계 마하수 지연", "이륙 거리 단축", "착륙 속도 감소"], "answer": 1, "topic": "공기역학", "explanation": "후퇴각은 날개에 흐르는 공기 흐름의 속도를 실제 항공기 속도보다 느리게 만들어, 충격파 발생 시점인 임계 마하수를 더 높은 속도로 지연시키는 효과가 있습니다."},
-        {"id": 20, "part": "Part 1. 비행이론", "question": "흐름의 분리가 날개 앞쪽부터 시작되어 급격한 양력 손실을 초래하는 실속 형태는?", "options": ["점진적 실속", "익단 실속", "익근 실속", "급성 실속"], "answer": 3, "topic": "공기역학", "explanation": "직사각형 날개는 익근(wing root)부터 실속이 시작되어 조종이 용이하지만, 특정 날개 형태에서는 날개 전체 또는 앞쪽부터 급격히 실속이 발생하여 매우 위험할 수 있습니다."},
-        
-        # Part 2. 비행운용
-        {"id": 21, "part": "Part 2. 비행운용", "question": "왕복 엔진에서 혼합비(Mixture)를 희박(Lean)하게 만드는 주된 이유는?", "options": ["엔진 출력 증가", "엔진 냉각", "연료 효율 증대", "시동 용이성"], "answer": 2, "topic": "항공기 시스템", "explanation": "고도가 높아져 공기 밀도가 낮아지면 혼합비가 농후(Rich)해집니다. 이를 희박(Lean)하게 조정하여 최적의 공연비를 맞춰 연료 효율을 높이고 엔진의 부드러운 작동을 돕습니다."},
-        {"id": 22, "part": "Part 2. 비행운용", "question": "유압 계통(Hydraulic System)이 주로 사용되는 곳이 아닌 것은?", "options": ["착륙 장치(Landing Gear)", "플랩(Flaps)", "비행 조종면(Flight Controls)", "객실 조명(Cabin Lights)"], "answer": 3, "topic": "항공기 시스템", "explanation": "유압 계통은 파스칼의 원리를 이용해 작은 힘으로 큰 힘을 내는 시스템으로, 착륙장치, 플랩, 브레이크 등 큰 힘이 필요한 곳에 사용됩니다. 객실 조명은 전기 계통에 해당합니다."},
-        {"id": 23, "part": "Part 2. 비행운용", "question": "항공기 전기 계통에서 교류(AC)를 직류(DC)로 변환하는 장치는?", "options": ["인버터(Inverter)", "정류기(Rectifier)", "발전기(Generator)", "배터리(Battery)"], "answer": 1, "topic": "항공기 시스템", "explanation": "정류기(TRU: Transformer Rectifier Unit)는 발전기에서 생산된 교류(AC) 전원을 항공기 배터리 및 여러 계통에서 사용하는 직류(DC) 전원으로 변환하는 장치입니다. 반대로 인버터는 DC를 AC로 변환합니다."},
-        {"id": 24, "part": "Part 2. 비행운용", "question": "피토-정압 계통(Pitot-Static System)이 정보를 제공하는 계기가 아닌 것은?", "options": ["속도계(Airspeed Indicator)", "고도계(Altimeter)", "자세계(Attitude Indicator)", "승강계(Vertical Speed Indicator)"], "answer": 2, "topic": "항공기 시스템", "explanation": "속도계, 고도계, 승강계는 공기압(충압, 정압)을 이용하는 계기들입니다. 자세계는 자이로(Gyro) 원리를 이용하여 항공기의 자세를 보여주는 계기로, 피토-정압 계통과 무관합니다."},
-        {"id": 25, "part": "Part 2. 비행운용", "question": "엔진 오일의 주요 기능이 아닌 것은?", "options": ["윤활", "냉각", "세척", "연료 공급"], "answer": 3, "topic": "항공기 시스템", "explanation": "엔진 오일은 부품 간의 마찰을 줄이는 윤활 작용, 엔진의 열을 식히는 냉각 작용, 내부의 불순물을 제거하는 세척 작용 등을 합니다. 연료 공급은 연료 계통의 역할입니다."},
-        {"id": 26, "part": "Part 2. 비행운용", "question": "고정피치 프로펠러(Fixed-Pitch Propeller)의 피치는 어느 비행 상태에 최적화되어 있는가?", "options": ["이륙", "순항", "착륙", "모든 상태"], "answer": 1, "topic": "항공기 시스템", "explanation": "고정피치 프로펠러는 하나의 피치 각도만 가지고 있어 모든 비행 영역에서 최적의 효율을 낼 수 없습니다. 보통 연료 효율이 중요한 순항 비행 상태에 맞춰 설계됩니다."},
-        {"id": 27, "part": "Part 2. 비행운용", "question": "방빙(Anti-icing) 장비의 올바른 사용 시점은?", "options": ["얼음이 생긴 후", "얼음이 생기기 전 또는 예상될 때", "얼음 두께가 1인치 이상일 때", "상관 없음"], "answer": 1, "topic": "항공기 시스템", "explanation": "방빙(Anti-icing)은 얼음이 생기는 것을 '방지'하는 장비이므로, 착빙이 예상되는 조건에 들어가기 전에 미리 작동시켜야 합니다. 제빙(De-icing)은 이미 생긴 얼음을 '제거'하는 장비입니다."},
-        {"id": 28, "part": "Part 2. 비행운용", "question": "항공기 객실 여압(Cabin Pressurization)의 주된 목적은?", "options": ["산소 공급", "소음 감소", "저산소증 방지", "온도 조절"], "answer": 2, "topic": "항공기 시스템", "explanation": "높은 고도는 공기가 희박하여 저산소증을 유발할 수 있습니다. 여압 장치는 고고도에서도 객실 내의 기압을 인체가 견딜 수 있는 수준(보통 8,000피트 고도 이하)으로 유지시켜 저산소증을 방지합니다."},
-        {"id": 29, "part": "Part 2. 비행운용", "question": "가스터빈 엔진의 주요 4단계 사이클은?", "options": ["흡입-폭발-압축-배기", "흡입-압축-연소-배기", "압축-흡입-연소-배기", "흡입-연소-압축-배기"], "answer": 1, "topic": "항공기 시스템", "explanation": "가스터빈 엔진은 브레이튼 사이클(Brayton Cycle)을 따르며, 공기를 흡입(Intake), 압축(Compression), 연료와 혼합하여 연소(Combustion), 그리고 뜨거운 가스를 배출(Exhaust)하는 4단계를 거쳐 추력을 얻습니다."},
-        {"id": 30, "part": "Part 2. 비행운용", "question": "항공기 타이어에 공기 대신 질소를 주입하는 주된 이유는?", "options": ["무게 감소", "온도 변화에 따른 압력 변화가 적음", "비용 절감", "구하기 쉬움"], "answer": 1, "topic": "항공기 시스템", "explanation": "질소는 공기보다 수분 함량이 거의 없고, 온도 변화에 따른 압력 변화가 적어 안정적입니다. 또한 고온에서도 산화 반응(화재 위험)을 일으키지 않아 항공기 타이어에 사용됩니다."},
-        {"id": 31, "part": "Part 2. 비행운용", "question": "자세계(Attitude Indicator)가 조종사에게 보여주는 정보는?", "options": ["항공기의 속도", "항공기의 고도", "항공기의 피치와 뱅크", "항공기의 방향"], "answer": 2, "topic": "비행 계기", "explanation": "자세계는 인공 수평선(Artificial Horizon)을 기준으로 항공기의 기수 올림/내림(피치)과 좌우 기울어짐(뱅크) 상태를 직관적으로 보여줍니다."},
-        {"id": 32, "part": "Part 2. 비행운용", "question": "자기 나침반(Magnetic Compass)의 오차가 가장 심하게 나타나는 선회는?", "options": ["동쪽 또는 서쪽으로 선회 시", "남쪽 또는 북쪽으로 선회 시", "적도 부근에서 선회 시", "극지방에서 선회 시"], "answer": 0, "topic": "비행 계기", "explanation": "북반구에서 동쪽이나 서쪽으로 선회할 때 가속/감속 오차(ANDS: Accelerate North, Decelerate South)가 나타나며, 나침반이 실제보다 앞서거나 뒤쳐지는 현상을 보입니다."},
-        {"id": 33, "part": "Part 2. 비행운용", "question": "선회계(Turn Coordinator)가 보여주는 정보 두 가지는?", "options": ["선회율과 선회 방향", "선회율과 미끄러짐", "피치와 뱅크", "고도와 속도"], "answer": 1, "topic": "비행 계기", "explanation": "선회계의 미니어처 비행기는 선회율(Rate of Turn)과 선회 방향(Direction of Turn)을, 아래의 볼(Ball)은 원심력과 중력의 균형, 즉 미끄러짐(Slip/Skid) 여부를 보여줍니다."},
-        {"id": 34, "part": "Part 2. 비행운용", "question": "고도계의 '코ල්스만 창(Kollsman Window)'에 조종사가 입력하는 값은?", "options": ["현재 고도", "현재 기압", "현재 온도", "목표 고도"], "answer": 1, "topic": "비행 계기", "explanation": "코ල්스만 창에는 현재 위치의 해수면 기압(Altimeter Setting)을 입력합니다. 이를 통해 고도계가 정확한 해발 고도(MSL)를 지시하도록 보정할 수 있습니다."},
-        {"id": 35, "part": "Part 2. 비행운용", "question": "속도계(ASI)에 표시된 Vno 속도는 무엇을 의미하는가?", "options": ["실속 속도", "최대 플랩 작동 속도", "정상 운용 범위의 최대 속도", "절대 초과 금지 속도"], "answer": 2, "topic": "비행 계기", "explanation": "Vno(Maximum structural cruising speed)는 정상 운용 범위의 최대 속도로, 녹색 아크(Green Arc)의 끝에 해당합니다. 이 속도는 잔잔한 공기 중에서만 초과할 수 있으며, 그 이상은 황색 아크(Yellow Arc)인 주의 운용 범위입니다."},
-        
-        # Part 3. 항법
-        {"id": 36, "part": "Part 3. 항법", "question": "VOR 항법 시설이 제공하는 정보는 무엇인가?", "options": ["방위(Azimuth)", "거리(Distance)", "고도(Altitude)", "위치(Position)"], "answer": 0, "topic": "항법", "explanation": "VOR(VHF Omnidirectional Range)은 지상국으로부터 항공기가 어느 방향(Radial)에 있는지를 알려주는 방위 정보를 제공합니다. DME가 함께 있어야 거리 정보를 알 수 있습니다."},
-        {"id": 37, "part": "Part 3. 항법", "question": "GPS가 정확한 위치를 계산하기 위해 최소 몇 개의 위성 신호가 필요한가?", "options": ["2개", "3개", "4개", "5개"], "answer": 2, "topic": "항법", "explanation": "GPS는 3차원 위치(위도, 경도, 고도)와 시간 오차를 보정하기 위해 최소 4개의 위성으로부터 신호를 수신해야 정확한 위치 정보를 계산할 수 있습니다."},
-        {"id": 38, "part": "Part 3. 항법", "question": "등각 원통 도법(Mercator Chart)에서 두 지점 간의 최단 거리는 어떻게 표현되는가?", "options": ["직선", "곡선", "원으로 표현됨", "표현 불가능"], "answer": 1, "topic": "항법", "explanation": "메르카토르 도법에서 직선은 항정선(Rhumb Line)으로, 방위는 일정하지만 최단 거리는 아닙니다. 두 지점 간의 최단 거리인 대권(Great Circle)은 이 지도에서 곡선으로 표현됩니다."},
-        {"id": 39, "part": "Part 3. 항법", "question": "항법에서 '편차(Variation)'란 무엇과 무엇의 차이를 의미하는가?", "options": ["진북과 자북", "자북과 나침반 북", "진북과 나침반 북", "지도와 실제 지형"], "answer": 0, "topic": "항법", "explanation": "편차(Magnetic Variation)는 지구의 진북(지리적 북극)과 자북(자기장의 북극)이 일치하지 않아 발생하는 각도의 차이를 말합니다. 이는 지역에 따라 다릅니다."},
-        {"id": 40, "part": "Part 3. 항법", "question": "NDB(Non-Directional Beacon)를 수신하는 항공기 계기는?", "options": ["VHF 수신기", "ADF (자동 방향 탐지기)", "DME (거리 측정 장비)", "GPS 수신기"], "answer": 1, "topic": "항법", "explanation": "ADF(Automatic Direction Finder)는 지상의 NDB 방송국에서 송신하는 저주파/중주파 전파를 수신하여 해당 방송국에 대한 상대 방향을 계기판에 표시해 주는 장비입니다."},
-        {"id": 41, "part": "Part 3. 항법", "question": "ILS(계기 착륙 장치)의 '글라이드 슬롭(Glide Slope)'이 제공하는 정보는?", "options": ["수평 정렬 정보", "수직 정렬 정보", "공항까지의 거리", "활주로 방향"], "answer": 1, "topic": "항법", "explanation": "ILS는 로컬라이저(Localizer)와 글라이드 슬롭(Glide Slope)으로 구성됩니다. 로컬라이저는 활주로 중심선과의 수평 정렬 정보를, 글라이드 슬롭은 적절한 강하 경로와의 수직 정렬 정보를 제공합니다."},
-        {"id": 42, "part": "Part 3. 항법", "question": "Dead Reckoning(추측 항법)에 필요한 두 가지 주요 정보는?", "options": ["시간과 속도", "방향과 고도", "바람과 온도", "위도와 경도"], "answer": 0, "topic": "항법", "explanation": "추측 항법은 알려진 위치에서 특정 방향(Heading)과 속도(Airspeed)로 일정 시간 동안 비행했을 때 현재 위치를 계산하는 항법입니다. 따라서 시간과 속도가 필수적입니다."},
-        {"id": 43, "part": "Part 3. 항법", "question": "항공로(Airway)의 폭은 일반적으로 얼마인가?", "options": ["양쪽으로 4 NM (총 8 NM)", "양쪽으로 8 NM (총 16 NM)", "양쪽으로 10 NM (총 20 NM)", "양쪽으로 2 NM (총 4 NM)"], "answer": 0, "topic": "항법", "explanation": "저고도 항공로(Victor Airway)는 일반적으로 중심선으로부터 양쪽으로 4해리(Nautical Mile), 즉 총 8해리의 폭을 가집니다."},
-        {"id": 44, "part": "Part 3. 항법", "question": "시간, 속도, 거리 계산에 사용되는 아날로그 컴퓨터는?", "options": ["E6B Flight Computer", "계산기", "GPS", "FMS"], "answer": 0, "topic": "항법", "explanation": "E6B는 비행에 필요한 다양한 계산(예: 연료 소모량, 바람 수정각, 진대기속도 등)을 할 수 있도록 고안된 슬라이드 룰 방식의 아날로그 비행 컴퓨터입니다."},
-        {"id": 45, "part": "Part 3. 항법", "question": "VFR 비행 시 사용하는 고도 규칙에서, 0~179도 방향으로 비행할 때의 권장 고도는?", "options": ["짝수 천 피트 + 500피트", "홀수 천 피트 + 500피트", "짝수 천 피트", "홀수 천 피트"], "answer": 1, "topic": "항법", "explanation": "VFR 순항 고도 규칙에 따르면, 3,000피트 AGL 이상에서 자침 방위(Magnetic Course)가 0도부터 179도 사이(동쪽 방향)일 때는 홀수 천 피트 + 500피트 (예: 3,500, 5,500)로 비행해야 합니다."},
-    
-        # Part 4. 항공기상
-        {"id": 46, "part": "Part 4. 항공기상", "question": "뇌우(Thunderstorm)가 형성되기 위한 3가지 조건이 아닌 것은?", "options": ["불안정한 대기", "높은 습도", "상승 기류", "강한 바람"], "answer": 3, "topic": "항공 기상", "explanation": "뇌우의 3요소는 불안정한 대기(공기가 쉽게 상승하려는 성질), 충분한 수증기(높은 습도), 그리고 공기를 강제로 상승시키는 요인(상승 기류)입니다. 강한 바람은 뇌우를 이동시키거나 흩어지게 할 수는 있지만 형성의 필수 조건은 아닙니다."},
-        {"id": 47, "part": "Part 4. 항공기상", "question": "안개(Fog)와 구름(Cloud)의 근본적인 차이는 무엇인가?", "options": ["수분 함량", "형성 고도", "온도", "색깔"], "answer": 1, "topic": "항공 기상", "explanation": "안개와 구름은 모두 작은 물방울이나 얼음 결정의 모임이라는 점에서 동일합니다. 유일한 차이는 안개는 지표면에 접촉하여 형성되고, 구름은 상공에서 형성된다는 점입니다."},
-        {"id": 48, "part": "Part 4. 항공기상", "question": "산악파(Mountain Waves)가 가장 강하게 형성될 수 있는 조건은?", "options": ["바람이 산맥에 평행하게 불 때", "바람이 산맥에 약하게 불 때", "바람이 산맥에 강하고 수직으로 불 때", "바람이 없을 때"], "answer": 2, "topic": "항공 기상", "explanation": "산악파는 안정된 대기층에서 강한 바람(약 20노트 이상)이 산맥의 능선에 거의 수직으로 불어올 때 가장 강하게 발달하며, 심한 난기류를 유발할 수 있습니다."},
-        {"id": 49, "part": "Part 4. 항공기상", "question": "METAR에서 'SCT030'은 무엇을 의미하는가?", "options": ["300피트에 구름이 많음", "3,000피트에 구름이 흩어져 있음", "30,000피트에 구름이 거의 없음", "3,000피트에 구름이 깨져 있음"], "answer": 1, "topic": "항공 기상", "explanation": "METAR에서 SCT는 Scattered(하늘의 3/8~4/8)를, 뒤의 숫자 030은 고도 3,000피트(AGL)를 의미합니다. 따라서 '3,000피트에 구름이 흩어져 있다'는 뜻입니다."},
-        {"id": 50, "part": "Part 4. 항공기상", "question": "착빙(Icing)이 가장 발생하기 쉬운 온도 범위는?", "options": ["-20°C ~ -40°C", "0°C ~ -20°C", "0°C ~ 10°C", "-40°C 이하"], "answer": 1, "topic": "항공 기상", "explanation": "착빙은 항공기가 과냉각된 물방울(액체 상태지만 온도는 0°C 이하)이 있는 구름 속을 통과할 때 발생합니다. 이러한 조건은 보통 0°C에서 -20°C 사이의 온도에서 가장 흔하게 나타납니다."}
+# --- 사용자·파트별 누적 성적 갱신 ---
+HISTORY_RECENT_LIMIT = int(os.environ.get('HISTORY_RECENT_LIMIT', '10'))  # 추세 계산에 쓰는 최근 응시 수
+
+def _score_pct(score, total):
+    return score * 100.0 / total if total > 0 else 0.0
+
+def update_user_part_stats(cursor, rows):
+    # 같은 (사용자, 파트)가 한 배치에 여러 번 나올 수 있으므로 먼저 묶어서 한 행씩 upsert
+    grouped = {}
+    for user_email, date, score, total, part, *_ in sorted(rows, key=lambda r: r[1], reverse=True):
+        pct = _score_pct(score, total)
+        stat = grouped.get((user_email, part))
+        if stat is None:
+            # 최신 기록이 먼저 오므로 첫 행이 마지막 응시
+            grouped[(user_email, part)] = stat = {
+                'attempts': 0, 'score_sum': 0, 'total_sum': 0, 'pct_sum': 0.0, 'best_pct': pct,
+                'last_pct': pct, 'last_date': date, 'recent_pcts': [], 'recent_dates': [],
+            }
+        stat['attempts'] += 1
+        stat['score_sum'] += score
+        stat['total_sum'] += total
+        stat['pct_sum'] += pct
+        stat['best_pct'] = max(stat['best_pct'], pct)
+        if len(stat['recent_pcts']) < HISTORY_RECENT_LIMIT:
+            stat['recent_pcts'].append(pct)
+            stat['recent_dates'].append(date)
+
+    # 다른 배치(다른 워커)와 같은 순서로 행을 잠가야 교착 상태가 생기지 않는다
+    values = [
+        (user_email, part, st['attempts'], st['score_sum'], st['total_sum'], st['pct_sum'],
+         st['best_pct'], st['last_pct'], st['last_date'], st['recent_pcts'], st['recent_dates'])
+        for (user_email, part), st in sorted(grouped.items())
     ]
-  
+    execute_values(
+        cursor,
+        f"""
+        INSERT INTO user_part_stats
+            (user_email, part, attempts, score_sum, total_sum, pct_sum, best_pct, last_pct, last_date,
+             recent_pcts, recent_dates)
+        VALUES %s
+        ON CONFLICT (user_email, part) DO UPDATE SET
+            attempts = user_part_stats.attempts + EXCLUDED.attempts,
+            score_sum = user_part_stats.score_sum + EXCLUDED.score_sum,
+            total_sum = user_part_stats.total_sum + EXCLUDED.total_sum,
+            pct_sum = user_part_stats.pct_sum + EXCLUDED.pct_sum,
+            best_pct = GREATEST(user_part_stats.best_pct, EXCLUDED.best_pct),
+            last_pct = CASE WHEN EXCLUDED.last_date >= user_part_stats.last_date
+                            THEN EXCLUDED.last_pct ELSE user_part_stats.last_pct END,
+            last_date = GREATEST(user_part_stats.last_date, EXCLUDED.last_date),
+            -- 다시 넣은 예전 기록(파일에 내려 두었던 행)이 최신 기록보다 앞에 오지 않도록 날짜순으로 합친다
+            (recent_pcts, recent_dates) = (
+                SELECT COALESCE(array_agg(pct ORDER BY date DESC), '{{}}'), COALESCE(array_agg(date ORDER BY date DESC), '{{}}')
+                FROM (
+                    SELECT pct, date
+                    FROM unnest(EXCLUDED.recent_pcts || user_part_stats.recent_pcts,
+                                EXCLUDED.recent_dates || user_part_stats.recent_dates) AS r(pct, date)
+                    ORDER BY date DESC
+                    LIMIT {HISTORY_RECENT_LIMIT}
+                ) recent
+            )
+        """,
+        values,
+        template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::double precision[], %s::timestamp[])",
+        page_size=len(values) or 1
+    )
+
+# --- 주제/문제별 정답률 누적 갱신 ---
+def _upsert_counts(cursor, table, key_columns, counts):
+    if not counts:
+        return
+    keys = ', '.join(key_columns)
+    execute_values(
+        cursor,
+        f"""
+        INSERT INTO {table} ({keys}, correct, total) VALUES %s
+        ON CONFLICT ({keys}) DO UPDATE SET
+            correct = {table}.correct + EXCLUDED.correct,
+            total = {table}.total + EXCLUDED.total
+        """,
+        # 정렬된 순서로 갱신해야 동시에 도는 배치끼리 교착 상태가 생기지 않는다
+        [(*(key if isinstance(key, tuple) else (key,)), c, t) for key, (c, t) in sorted(counts.items())],
+        page_size=len(counts)
+    )
+
+def update_topic_stats(cursor, rows):
+    user_topics, topics, questions = {}, {}, {}
+
+    def add(counts, key, correct, total):
+        c, t = counts.get(key, (0, 0))
+        counts[key] = (c + correct, t + total)
+
+    for user_email, _date, _score, _total, _part, topic_results, question_results in rows:
+        for topic, (correct, total) in (topic_results or {}).items():
+            add(user_topics, (user_email, topic), correct, total)
+            add(topics, topic, correct, total)
+        for question_id, correct in question_results or []:
+            add(questions, question_id, int(correct), 1)
+
+    _upsert_counts(cursor, 'user_topic_stats', ('user_email', 'topic'), user_topics)
+    _upsert_counts(cursor, 'topic_stats', ('topic',), topics)
+    _upsert_counts(cursor, 'question_stats', ('question_id',), questions)
+
+# --- 문제별 복습 상태 갱신 (간격 반복) ---
+SRS_FIRST_INTERVAL_HOURS = float(os.environ.get('SRS_FIRST_INTERVAL_HOURS', '24'))
+SRS_EASE = float(os.environ.get('SRS_EASE', '2.5'))
+SRS_MAX_INTERVAL_HOURS = float(os.environ.get('SRS_MAX_INTERVAL_HOURS', str(24 * 60)))
+
+def update_question_state(cursor, rows):
+    # 맞히면 복습 간격을 SRS_EASE배로 늘리고, 틀리면 간격을 0으로 돌려 바로 다시 출제 대상이 되게 한다
+    latest = {}
+    for user_email, date, _score, _total, _part, _topics, question_results in sorted(rows, key=lambda r: r[1]):
+        for question_id, correct in question_results or []:
+            key = (user_email, question_id)
+            attempts, correct_sum, _, _ = latest.get(key, (0, 0, None, None))
+            latest[key] = (attempts + 1, correct_sum + int(correct), bool(correct), date)
+    if not latest:
+        return
+
+    values = []
+    for (user_email, question_id), (attempts, correct_sum, last_correct, date) in sorted(latest.items()):
+        interval = SRS_FIRST_INTERVAL_HOURS if last_correct else 0.0
+        values.append((user_email, question_id, attempts, correct_sum, int(last_correct), interval,
+                       date + timedelta(hours=interval), date))
+    next_interval = f"""
+        CASE WHEN EXCLUDED.streak > 0
+             THEN LEAST(GREATEST(user_question_state.interval_hours * {SRS_EASE}, {SRS_FIRST_INTERVAL_HOURS}), {SRS_MAX_INTERVAL_HOURS})
+             ELSE 0 END
+    """
+    is_newer = "EXCLUDED.last_seen >= user_question_state.last_seen"
+    execute_values(
+        cursor,
+        f"""
+        INSERT INTO user_question_state
+            (user_email, question_id, attempts, correct, streak, interval_hours, due_at, last_seen)
+        VALUES %s
+        ON CONFLICT (user_email, question_id) DO UPDATE SET
+            attempts = user_question_state.attempts + EXCLUDED.attempts,
+            correct = user_question_state.correct + EXCLUDED.correct,
+            -- 나중에 다시 넣은 예전 응시(파일에 내려 두었던 행)는 횟수만 더하고 복습 일정은 되돌리지 않는다
+            streak = CASE WHEN {is_newer}
+                          THEN CASE WHEN EXCLUDED.streak > 0 THEN user_question_state.streak + 1 ELSE 0 END
+                          ELSE user_question_state.streak END,
+            interval_hours = CASE WHEN {is_newer} THEN {next_interval} ELSE user_question_state.interval_hours END,
+            due_at = CASE WHEN {is_newer}
+                          THEN EXCLUDED.last_seen + ({next_interval}) * INTERVAL '1 hour'
+                          ELSE user_question_state.due_at END,
+            last_seen = GREATEST(user_question_state.last_seen, EXCLUDED.last_seen)
+        """,
+        values,
+        page_size=len(values)
+    )
+
+# --- 문제 일괄 가져오기/내보내기 ---
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '1000'))
+EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', '2000'))
+QUESTION_FIELDS = ('key', 'part', 'question', 'options', 'answer', 'topic', 'explanation', 'display_order')
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+
+class QuestionImportError(ValueError):
+    pass
+
+
+def question_key(part_name, question):
+    # _migrate_question_key의 md5(p.name || E'\n' || q.question) 와 같은 값
+    return hashlib.md5(f"{part_name}\n{question}".encode('utf-8')).hexdigest()
+
+def _validate_question(raw, line):
+    def fail(message):
+        raise QuestionImportError(f"line {line}: {message}")
+
+    def text(name):
+        value = raw.get(name)
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            fail(f"{name} must be a string")
+        return value
+
+    if not isinstance(raw, dict):
+        fail("not a JSON object")
+    part = text('part').strip()
+    question = text('question').strip()
+    topic = text('topic').strip()
+    if not part or not question or not topic:
+        fail("part, question, topic are required")
+
+    options = raw.get('options')
+    if isinstance(options, str):
+        try:
+            options = json.loads(options)
+        except ValueError:
+            fail("options must be a JSON array")
+    if not isinstance(options, list) or len(options) < 2 or not all(isinstance(o, str) and o.strip() for o in options):
+        fail("options must be a list of at least two non-empty strings")
+
+    answer = raw.get('answer')
+    if isinstance(answer, (bool, float)):  # int(True), int(1.9)가 조용히 1이 되지 않도록
+        fail("answer must be an option index")
+    try:
+        answer = int(answer)
+    except (TypeError, ValueError):
+        fail("answer must be an option index")
+    if not 0 <= answer < len(options):
+        fail(f"answer {answer} is out of range for {len(options)} options")
+
+    display_order = raw.get('display_order')
+    if display_order in (None, ''):
+        display_order = None
+    elif isinstance(display_order, (bool, float)):
+        fail("display_order must be an integer")
+    else:
+        try:
+            display_order = int(display_order)
+        except (TypeError, ValueError):
+            fail("display_order must be an integer")
+
+    return {
+        'key': text('key').strip() or question_key(part, question),
+        'part': part, 'question': question, 'options': options, 'answer': answer,
+        'topic': topic, 'explanation': text('explanation') or None, 'display_order': display_order,
+    }
+
+def read_question_file(stream, fmt):
+    # (줄 번호, 원본 dict)를 하나씩 돌려주므로 파일 크기와 관계없이 메모리 사용이 일정하다
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_no, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    yield line_no, None  # 검증 단계에서 오류로 처리 (--skip-invalid 이면 건너뜀)
+    else:
+        raise QuestionImportError(f"unsupported format: {fmt}")
+
+def _flush_import_batch(cursor, batch, part_ids, orders, next_order, explicit_parts):
+    new_parts = [name for name in dict.fromkeys(q['part'] for q in batch.values()) if name not in part_ids]
+    if new_parts:
+        execute_values(
+            cursor, "INSERT INTO parts (name) VALUES %s ON CONFLICT (name) DO NOTHING", [(n,) for n in new_parts]
+        )
+        cursor.execute("SELECT id, name FROM parts WHERE name = ANY(%s)", (new_parts,))
+        part_ids.update((name, part_id) for part_id, name in cursor.fetchall())
+
+    values = []
+    for q in batch.values():
+        part_id = part_ids[q['part']]
+        order = q['display_order']
+        if order is None:
+            # 같은 파트에 있던 문제는 순서를 유지하고, 새 문제나 다른 파트로 옮긴 문제는 파트의 맨 뒤에 붙인다
+            previous_part, order = orders.get(q['key'], (None, None))
+            if previous_part != part_id:
+                order = next_order.get(part_id, 1)
+        else:
+            explicit_parts.add(part_id)
+        next_order[part_id] = max(next_order.get(part_id, 1), order + 1)
+        orders[q['key']] = (part_id, order)
+        values.append((part_id, q['question'], json.dumps(q['options'], ensure_ascii=False), q['answer'],
+                       q['topic'], q['explanation'], order, q['key']))
+
+    results = execute_values(
+        cursor,
+        """
+        INSERT INTO questions (part_id, question, options, answer, topic, explanation, display_order, question_key)
+        VALUES %s
+        ON CONFLICT (question_key) DO UPDATE SET
+            part_id = EXCLUDED.part_id, question = EXCLUDED.question, options = EXCLUDED.options,
+            answer = EXCLUDED.answer, topic = EXCLUDED.topic, explanation = EXCLUDED.explanation,
+            display_order = EXCLUDED.display_order
+        RETURNING (xmax = 0)
+        """,
+        values, page_size=len(values), fetch=True
+    )
+    inserted = sum(1 for (is_insert,) in results if is_insert)
+    return inserted, len(values) - inserted
+
+def _renumber_duplicate_orders(cursor, part_ids):
+    # 파일에 적힌 display_order가 다른 문제와 겹친 파트만 (display_order, id) 순으로 1부터 다시 매긴다
+    cursor.execute(
+        """
+        UPDATE questions q SET display_order = r.display_order
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY part_id ORDER BY display_order, id) AS display_order
+            FROM questions
+            WHERE part_id IN (
+                SELECT part_id FROM questions WHERE part_id = ANY(%s)
+                GROUP BY part_id, display_order HAVING COUNT(*) > 1
+            )
+        ) r
+        WHERE q.id = r.id AND q.display_order <> r.display_order
+        """,
+        (list(part_ids),)
+    )
+
+def import_questions(records, skip_invalid=False, batch_size=IMPORT_BATCH_SIZE):
+    # 전체를 한 트랜잭션으로 처리: 중간에 실패하면 아무것도 반영되지 않는다
+    summary = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': []}
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM parts")
-            if cursor.fetchone()[0] == 0:
-                print("Database 'parts' table is empty. Populating...")
-                parts = sorted(set(q['part'] for q in initial_quiz_questions))
-                for part_name in parts:
-                    cursor.execute("INSERT INTO parts (name) VALUES (%s)", (part_name,))
-                print("'parts' table populated.")
-
-            cursor.execute("SELECT COUNT(*) FROM questions")
-            if cursor.fetchone()[0] == 0:
-                print("Database 'questions' table is empty. Populating...")
-                cursor.execute("SELECT id, name FROM parts")
-                part_map = {name: id for id, name in cursor.fetchall()}
-
-                for i, q in enumerate(initial_quiz_questions, start=1):
-                    part_id = part_map.get(q['part'])
-                    if part_id:
-                        cursor.execute(
-                            """
-                            INSERT INTO questions (part_id, question, options, answer, topic, explanation, display_order) 
-                            VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            """,
-                            (part_id, q['question'], json.dumps(q['options'], ensure_ascii=False), q['answer'], q['topic'], q['explanation'], i)
-                        )
-                print("'questions' table populated.")
-        conn.commit()
+            cursor.execute("SELECT id, name FROM parts")
+            part_ids = {name: part_id for part_id, name in cursor.fetchall()}
+            cursor.execute("SELECT question_key, part_id, display_order FROM questions")
+            orders, next_order, explicit_parts = {}, {}, set()  # orders: key -> (part_id, display_order)
+            for key, part_id, order in cursor.fetchall():
+                orders[key] = (part_id, order)
+                next_order[part_id] = max(next_order.get(part_id, 1), order + 1)
 
-# 초기화 실행
-with app.app_context():
-    init_db()
-    populate_db_if_empty()
+            batch = {}  # key -> 문제 (한 배치 안에서 같은 키는 마지막 것만 사용)
+            for line, raw in records:
+                try:
+                    q = _validate_question(raw, line)
+                except QuestionImportError as e:
+                    if not skip_invalid:
+                        raise
+                    summary['skipped'] += 1
+                    if len(summary['errors']) < IMPORT_MAX_REPORTED_ERRORS:
+                        summary['errors'].append(str(e))
+                    continue
+                batch[q['key']] = q
+                if len(batch) >= batch_size:
+                    inserted, updated = _flush_import_batch(cursor, batch, part_ids, orders, next_order, explicit_parts)
+                    summary['inserted'] += inserted
+                    summary['updated'] += updated
+                    batch = {}
+            if batch:
+                inserted, updated = _flush_import_batch(cursor, batch, part_ids, orders, next_order, explicit_parts)
+                summary['inserted'] += inserted
+                summary['updated'] += updated
+            if explicit_parts:
+                _renumber_duplicate_orders(cursor, explicit_parts)
+    question_cache.invalidate()
+    return summary
+
+def export_questions(fmt, part_name=None):
+    # 서버 측(named) 커서로 EXPORT_FETCH_SIZE 행씩 받아 한 줄씩 내보낸다
+    if fmt not in ('csv', 'jsonl'):
+        raise QuestionImportError(f"unsupported format: {fmt}")
+    query = """
+        SELECT q.question_key, p.name, q.question, q.options, q.answer, q.topic, q.explanation, q.display_order
+        FROM questions q JOIN parts p ON q.part_id = p.id
+        WHERE %(part)s::text IS NULL OR p.name = %(part)s
+        ORDER BY p.id, q.display_order, q.id
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(QUESTION_FIELDS)
+        yield buffer.getvalue()
+    with get_db_connection() as conn:
+        with conn.cursor(name='export_questions') as cursor:
+            cursor.itersize = EXPORT_FETCH_SIZE
+            cursor.execute(query, {'part': part_name})
+            for row in cursor:
+                if fmt == 'csv':
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerow(row)  # options는 DB에 저장된 JSON 배열 문자열 그대로
+                    yield buffer.getvalue()
+                else:
+                    record = dict(zip(QUESTION_FIELDS, row))
+                    record['options'] = json.loads(record['options'])
+                    yield json.dumps(record, ensure_ascii=False) + '\n'
+
+def _infer_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+@bp.cli.command('import-questions')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help="기본값: 확장자로 판단")
+@click.option('--skip-invalid', is_flag=True, help="잘못된 행은 건너뛰고 나머지를 가져온다")
+def import_questions_command(path, fmt, skip_invalid):
+    start = time.perf_counter()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        try:
+            summary = import_questions(read_question_file(f, _infer_format(path, fmt)), skip_invalid=skip_invalid)
+        except QuestionImportError as e:
+            raise click.ClickException(str(e))
+    for error in summary['errors']:
+        click.echo(f"skipped {error}", err=True)
+    click.echo(f"Imported {summary['inserted']} new, {summary['updated']} updated, "
+               f"{summary['skipped']} skipped in {time.perf_counter() - start:.1f}s")
+
+@bp.cli.command('export-questions')
+@click.argument('path', default='-')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help="기본값: 확장자로 판단 (표준 출력은 jsonl)")
+@click.option('--part', 'part_name', help="이 파트만 내보낸다")
+def export_questions_command(path, fmt, part_name):
+    fmt = _infer_format(path, fmt)
+    with click.open_file(path, 'w', encoding='utf-8') as f:
+        for chunk in export_questions(fmt, part_name):
+            f.write(chunk)
+
+# --- 초기 데이터 삽입 함수 ---
+SEED_QUESTIONS_PATH = os.environ.get('SEED_QUESTIONS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seed_questions.jsonl'))
+
+def populate_db_if_empty(path=SEED_QUESTIONS_PATH):
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM questions)")
+            has_questions = cursor.fetchone()[0]
+
+    if not has_questions:
+        print("Database 'questions' table is empty. Populating...")
+        with open(path, encoding='utf-8') as f:
+            import_questions(read_question_file(f, 'jsonl'))
+        print("'questions' table populated.")
+
+# --- 미리 직렬화/압축한 JSON 응답 ---
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '512'))
+
+def prepare_json_payload(data):
+    # 한 번만 직렬화해서 원본/gzip/brotli 바이트와 ETag를 만들어 둔다
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    encodings = {}
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encodings['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            encodings['br'] = brotli.compress(body, quality=11)
+    # 같은 내용이면 워커가 달라도 같은 ETag가 나오도록 내용 해시를 사용
+    return {'etag': hashlib.sha1(body).hexdigest()[:20], 'body': body, 'encodings': encodings}
+
+def prepared_json_response(payload):
+    # 인코딩별로 바이트가 달라지므로 약한(weak) ETag를 사용
+    if request.if_none_match.contains_weak(payload['etag']):
+        response = current_app.response_class(status=304)
+    else:
+        body, encoding = payload['body'], None
+        for candidate in ('br', 'gzip'):
+            if candidate in payload['encodings'] and request.accept_encodings[candidate]:
+                body, encoding = payload['encodings'][candidate], candidate
+                break
+        response = current_app.response_class(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(payload['etag'], weak=True)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# --- 문제 은행 캐시 ---
+QUESTION_CACHE_MAX_PARTS = int(os.environ.get('QUESTION_CACHE_MAX_PARTS', '64'))
+BANK_VERSION_CHECK_INTERVAL = float(os.environ.get('BANK_VERSION_CHECK_INTERVAL', '5'))  # bank_version 확인 주기(초)
+
+def build_answer_key(questions):
+    return {q['id']: {'answer': q['answer'], 'correct_text': q['options'][q['answer']], 'topic': q['topic']}
+            for q in questions}
+
+
+class QuestionBankCache:
+    # 파트별로 파싱된 문제 목록과 채점용 정답표를 워커 메모리에 보관한다.
+    # 반환되는 항목은 여러 요청이 공유하므로 읽기 전용으로만 사용해야 한다.
+    def __init__(self, max_parts, check_interval):
+        self._max_parts = max_parts
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # part name -> entry, LRU 순서 (없는 파트는 저장하지 않음)
+        self._parts = None             # 파트 목록 응답 (버전이 바뀌면 폐기)
+        self._version = None
+        self._checked_at = float('-inf')
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _read_version(cursor):
+        cursor.execute("SELECT version FROM bank_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def _adopt_version_locked(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._parts = None
+            self._version = version
+
+    def _sync_version(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self._check_interval:
+                return
+            self._checked_at = now  # 동시에 여러 스레드가 확인하러 가지 않도록 먼저 갱신
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                version = self._read_version(cursor)
+        with self._lock:
+            self._adopt_version_locked(version)
+
+    def _load_part(self, part_name):
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+                # 버전을 먼저 읽어야 로딩 도중 바뀐 내용이 다음 확인 때 무효화된다
+                version = self._read_version(cursor)
+                cursor.execute("SELECT id FROM parts WHERE name = %s", (part_name,))
+                part = cursor.fetchone()
+                rows = []
+                if part:
+                    # 내부용 question_key는 클라이언트에 보내지 않는다
+                    cursor.execute('''
+                        SELECT id, part_id, question, options, answer, topic, explanation, display_order
+                        FROM questions WHERE part_id = %s ORDER BY display_order
+                    ''', (part['id'],))
+                    rows = cursor.fetchall()
+        if not part:
+            return version, None
+
+        questions = []
+        for row in rows:
+            question = dict(row)
+            question['options'] = json.loads(question['options'])
+            questions.append(question)
+        return version, {'part_id': part['id'], 'questions': questions, 'answer_key': build_answer_key(questions),
+                         'response': prepare_json_payload(questions)}
+
+    def _load_parts(self):
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+                version = self._read_version(cursor)
+                cursor.execute("SELECT id, name FROM parts ORDER BY id")
+                parts = [dict(row) for row in cursor.fetchall()]
+        return version, {'parts': parts, 'response': prepare_json_payload(parts)}
+
+    def get_parts(self):
+        self._sync_version()
+        with self._lock:
+            if self._parts is not None:
+                self.hits += 1
+                return self._parts
+            self.misses += 1
+
+        version, parts = self._load_parts()
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._adopt_version_locked(version)
+            if version == self._version:
+                self._parts = parts
+        return parts
+
+    def get_part(self, part_name):
+        self._sync_version()
+        with self._lock:
+            if part_name in self._entries:
+                self._entries.move_to_end(part_name)
+                self.hits += 1
+                return self._entries[part_name]
+            self.misses += 1
+
+        version, entry = self._load_part(part_name)
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._adopt_version_locked(version)
+            # 없는 파트 이름은 저장하지 않는다 (임의의 ?part= 값이 실제 파트를 밀어내지 않도록)
+            if version == self._version and entry is not None:
+                self._entries[part_name] = entry
+                self._entries.move_to_end(part_name)
+                while len(self._entries) > self._max_parts:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        # 이 프로세스에서 문제를 수정한 직후 호출 (다른 워커는 bank_version으로 감지)
+        with self._lock:
+            self._entries.clear()
+            self._parts = None
+            self._version = None
+            self._checked_at = float('-inf')
+
+    def stats(self):
+        with self._lock:
+            return {'version': self._version, 'parts': len(self._entries), 'max_parts': self._max_parts,
+                    'hits': self.hits, 'misses': self.misses}
+
+question_cache = QuestionBankCache(QUESTION_CACHE_MAX_PARTS, BANK_VERSION_CHECK_INTERVAL)
+
+# --- 비밀번호 해시 작업 풀 ---
+# bcrypt는 해시 계산 중 GIL을 놓기 때문에 스레드 풀로도 요청 스레드와 분리할 수 있다.
+# 제한은 워커 프로세스 단위이고 요청 스레드가 여러 개일 때만 의미가 있으므로 gthread 워커로 실행한다 (gunicorn.conf.py)
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+BCRYPT_TARGET_MS = float(os.environ.get('BCRYPT_TARGET_MS', '0'))  # 0보다 크면 이 지연 시간에 맞춰 cost를 보정
+BCRYPT_MIN_ROUNDS = int(os.environ.get('BCRYPT_MIN_ROUNDS', '10'))
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS', '2'))
+HASH_QUEUE_SIZE = int(os.environ.get('HASH_QUEUE_SIZE', '2'))       # 실행 중인 작업 외에 대기시킬 수 있는 작업 수 (워커당 스레드 수보다 작게)
+HASH_TIMEOUT = float(os.environ.get('HASH_TIMEOUT', '10'))
+HASH_RETRY_AFTER = int(os.environ.get('HASH_RETRY_AFTER', '2'))
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, workers, queue_size, rounds, target_ms):
+        self._workers = workers
+        self._capacity = workers + queue_size
+        self._rounds = rounds
+        self._target_ms = target_ms
+        self._calibrated = target_ms <= 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    def _ensure_executor(self):
+        # fork 이후에는 부모의 스레드가 없으므로 프로세스마다 새로 만든다
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='bcrypt')
+                    self._slots = threading.BoundedSemaphore(self._capacity)
+                    self._pid = pid
+        return self._executor, self._slots
+
+    def _calibrate(self):
+        # cost 8의 해시 시간을 재서 목표 지연 시간 안에 드는 가장 큰 cost를 고른다 (cost가 1 오를 때마다 2배)
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(8))
+        base_ms = (time.perf_counter() - start) * 1000
+        rounds = 8
+        while rounds < 16 and base_ms * 2 ** (rounds + 1 - 8) <= self._target_ms:
+            rounds += 1
+        rounds = max(rounds, BCRYPT_MIN_ROUNDS)
+        print(f"bcrypt cost calibrated to {rounds} (~{base_ms * 2 ** (rounds - 8):.0f}ms, target {self._target_ms:.0f}ms)")
+        return rounds
+
+    @property
+    def rounds(self):
+        if not self._calibrated:
+            with self._lock:
+                if not self._calibrated:
+                    self._rounds = self._calibrate()
+                    self._calibrated = True
+        return self._rounds
+
+    def _submit(self, fn, *args):
+        executor, slots = self._ensure_executor()
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=HASH_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusy()
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.rounds)).decode()
+
+    def hash(self, password):
+        return self._wait(self._submit(self._hash, password))
+
+    def check(self, password, password_hash):
+        return self._wait(self._submit(bcrypt.checkpw, password.encode(), password_hash.encode()))
+
+    def needs_rehash(self, password_hash):
+        try:
+            cost = int(password_hash.split('$')[2])
+        except (IndexError, ValueError):
+            return False
+        # 보정된 cost는 워커마다 조금씩 다를 수 있으므로 올리는 방향으로만 다시 해시한다
+        if self._target_ms > 0:
+            return cost < self.rounds
+        return cost != self.rounds
+
+    def rehash_in_background(self, email, password, old_hash):
+        # 여유가 없으면 이번에는 건너뛰고 다음 로그인 때 다시 시도
+        try:
+            future = self._submit(self._hash, password)
+        except HashingBusy:
+            return
+        future.add_done_callback(partial(_store_rehashed_password, email, old_hash))
+
+
+def _store_rehashed_password(email, old_hash, future):
+    if future.cancelled() or future.exception():
+        return
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE users SET password_hash = %s WHERE email = %s AND password_hash = %s",
+                    (future.result(), email, old_hash)
+                )
+    except Exception:
+        traceback.print_exc()
+
+password_hasher = PasswordHasher(HASH_WORKERS, HASH_QUEUE_SIZE, BCRYPT_ROUNDS, BCRYPT_TARGET_MS)
+
+# --- 퀴즈 기록 지연 저장 (write-behind) ---
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', '200'))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', '1'))  # 배치가 덜 차도 이 시간(초)마다 저장
+HISTORY_QUEUE_MAX = int(os.environ.get('HISTORY_QUEUE_MAX', '10000'))           # 넘치면 바로 파일로 내림
+HISTORY_SPILL_PATH = os.environ.get('HISTORY_SPILL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quiz_history_spill.jsonl'))
+# 저장할 수 없는 행(타입 오류 등)과 읽을 수 없는 줄은 여기로 옮겨 두고 다시 시도하지 않는다
+HISTORY_QUARANTINE_PATH = os.environ.get('HISTORY_QUARANTINE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quiz_history_rejected.jsonl'))
+
+# 이 예외들은 DB에 닿을 수 없거나 일시적인 충돌이므로 행을 파일에 내려 두었다가 나중에 다시 넣는다
+_HISTORY_RETRYABLE_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeout)
+
+
+class HistoryWriter:
+    # 제출 요청은 큐에 넣고 바로 응답하고, 백그라운드 스레드가 여러 행을 한 번에 INSERT 한다.
+    # DB에 쓸 수 없을 때는 로컬 파일에 내려 두었다가 다음에 DB가 살아나면 다시 넣는다.
+    def __init__(self, batch_size, flush_interval, queue_max, spill_path, quarantine_path):
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue_max = queue_max
+        self._spill_path = spill_path
+        self._quarantine_path = quarantine_path
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._claim_path = spill_path + '.replay'  # replay 중인 파일 (잠금을 오래 잡지 않도록 이름을 바꿔 처리)
+        self._spill_pending = os.path.exists(spill_path) or os.path.exists(self._claim_path)
+        self.stats_counts = {'queued': 0, 'written': 0, 'batches': 0, 'spilled': 0, 'replayed': 0, 'quarantined': 0}
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._cond:
+                if self._pid != pid:
+                    self._queue.clear()  # fork 전에 부모가 넣은 행은 부모가 저장한다
+                    self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                    self._thread.start()
+                    self._pid = pid
+
+    def submit(self, user_email, date, score, total, part, topic_results=None, question_results=None):
+        self._ensure_thread()
+        row = (user_email, date, score, total, part, topic_results, question_results)
+        with self._cond:
+            self.stats_counts['queued'] += 1
+            if len(self._queue) < self._queue_max:
+                self._queue.append(row)
+                if len(self._queue) >= self._batch_size:
+                    self._cond.notify()
+                return
+        self._spill([row])
+
+    def _take_batch_locked(self):
+        return [self._queue.popleft() for _ in range(min(self._batch_size, len(self._queue)))]
+
+    def _run(self):
+        while True:
+            # 예외로 스레드가 죽으면 다시 시작되지 않으므로 한 번의 실패가 이후 저장을 모두 막지 않게 한다
+            try:
+                with self._cond:
+                    if len(self._queue) < self._batch_size and not self._stopping:
+                        self._cond.wait(self._flush_interval)
+                    if self._stopping:
+                        return
+                    batch = self._take_batch_locked()
+                if batch:
+                    self._write(batch)
+                if self._spill_pending:
+                    self._replay_spill()
+            except Exception:
+                traceback.print_exc()
+                time.sleep(self._flush_interval)
+
+    def _insert(self, rows):
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    "INSERT INTO quiz_history (user_email, date, score, total, part, topic_results) VALUES %s",
+                    [(*row[:5], psycopg2.extras.Json(row[5], dumps=partial(json.dumps, ensure_ascii=False))
+                      if row[5] is not None else None)
+                     for row in rows],
+                    page_size=self._batch_size
+                )
+                update_user_part_stats(cursor, rows)
+                update_topic_stats(cursor, rows)
+                update_question_state(cursor, rows)
+
+    def _store(self, rows):
+        # 저장하지 못해 나중에 다시 시도할 행 목록을 돌려준다.
+        # 배치 전체가 한 행 때문에 실패했을 수 있으므로 한 행씩 다시 넣어 보고, 안 되는 행만 격리한다.
+        try:
+            self._insert(rows)
+            written = len(rows)
+        except _HISTORY_RETRYABLE_ERRORS:
+            traceback.print_exc()
+            return rows
+        except Exception:
+            traceback.print_exc()
+            written = 0
+            for i, row in enumerate(rows):
+                try:
+                    self._insert([row])
+                    written += 1
+                except _HISTORY_RETRYABLE_ERRORS:
+                    traceback.print_exc()
+                    self._count('written', written)
+                    return rows[i:]
+                except Exception as e:
+                    print(f"Rejected quiz_history row for {row[0]!r}: {e!r}")
+                    self._quarantine([self._spill_line(row)])
+        self._count('written', written)
+        self._count('batches', 1)
+        return []
+
+    def _write(self, rows):
+        unsaved = self._store(rows)
+        if unsaved:
+            self._spill(unsaved)
+        return not unsaved
+
+    def _count(self, name, n):
+        with self._cond:
+            self.stats_counts[name] += n
+
+    @staticmethod
+    def _spill_line(row):
+        email, date, *rest = row
+        date = date.isoformat() if isinstance(date, datetime) else date
+        return json.dumps([email, date, *rest], ensure_ascii=False, default=str) + '\n'
+
+    @staticmethod
+    def _parse_spill_line(line):
+        email, date, *rest = json.loads(line)
+        if not isinstance(email, str) or len(rest) > 5:
+            raise ValueError("unexpected spill row")
+        rest += [None] * (5 - len(rest))  # 주제 결과가 없던 예전 형식
+        return (email, datetime.fromisoformat(date), *rest)
+
+    @staticmethod
+    def _append_locked(path, lines):
+        data = ''.join(lines)
+        while True:
+            with open(path, 'a', encoding='utf-8') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                # 잠금을 기다리는 동안 replay가 파일 이름을 바꿨으면 새로 생긴 파일에 쓴다
+                try:
+                    if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                return
+
+    def _spill(self, rows):
+        self._append_locked(self._spill_path, [self._spill_line(row) for row in rows])
+        self._count('spilled', len(rows))
+        self._spill_pending = True
+
+    def _quarantine(self, lines):
+        self._append_locked(self._quarantine_path, lines)
+        self._count('quarantined', len(lines))
+        print(f"Moved {len(lines)} quiz_history rows to {self._quarantine_path}")
+
+    def _claim_spill(self):
+        # 내려 둔 파일을 replay용 이름으로 옮기고 잠근 파일을 돌려준다. 파일 잠금은 이름을 바꾸는 순간에만 잡으므로
+        # replay가 길어져도 다른 스레드는 새 파일에 바로 내려 쓸 수 있다.
+        # 이전 replay가 중간에 멈춘 파일이 남아 있으면 새 파일보다 그것을 먼저 이어서 처리한다.
+        if not os.path.exists(self._claim_path):
+            try:
+                with open(self._spill_path, 'r', encoding='utf-8') as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    if not os.path.exists(self._claim_path):
+                        os.rename(self._spill_path, self._claim_path)
+            except FileNotFoundError:
+                pass
+        try:
+            f = open(self._claim_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # 다른 워커가 방금 끝내고 지운 파일이면 다시 처리하지 않는다
+            if os.fstat(f.fileno()).st_ino != os.stat(self._claim_path).st_ino:
+                raise FileNotFoundError(self._claim_path)
+        except (BlockingIOError, FileNotFoundError):
+            f.close()
+            return None
+        return f
+
+    def _read_position(self):
+        try:
+            with open(self._claim_path + '.pos', encoding='utf-8') as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _save_position(self, position):
+        tmp_path = self._claim_path + '.pos.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(position))
+        os.replace(tmp_path, self._claim_path + '.pos')
+
+    def _replay_spill(self):
+        # batch_size 행씩 나눠 넣고, 넣을 때마다 읽은 위치를 기록해 중간에 멈춰도 같은 행을 두 번 넣지 않는다
+        f = self._claim_spill()
+        if f is None:
+            self._spill_pending = os.path.exists(self._spill_path) or os.path.exists(self._claim_path)
+            return
+        replayed = 0
+        finished = False
+        with f:
+            f.seek(self._read_position())
+            while True:
+                rows, unreadable = [], []
+                while len(rows) < self._batch_size:
+                    line = f.readline()
+                    if not line:
+                        break
+                    if not line.strip():
+                        continue
+                    try:
+                        rows.append(self._parse_spill_line(line))
+                    except (ValueError, TypeError):
+                        # 쓰다가 끊긴 줄 등은 다시 읽어도 실패하므로 격리
+                        unreadable.append(line if line.endswith('\n') else line + '\n')
+                unsaved = self._store(rows) if rows else []
+                if rows and len(unsaved) == len(rows):
+                    break  # DB에 닿지 않음: 이 배치부터 다음에 다시 시도
+                if unsaved:
+                    self._spill(unsaved)  # 일부만 저장된 배치의 나머지는 새 파일로 옮긴다
+                if unreadable:
+                    self._quarantine(unreadable)
+                replayed += len(rows) - len(unsaved)
+                if not rows and not unreadable:
+                    finished = True
+                    break
+                self._save_position(f.tell())
+                if unsaved:
+                    break
+            if finished:
+                os.unlink(self._claim_path)
+                try:
+                    os.unlink(self._claim_path + '.pos')
+                except FileNotFoundError:
+                    pass
+        self._count('replayed', replayed)
+        self._spill_pending = not finished or os.path.exists(self._spill_path)
+        if replayed:
+            print(f"Replayed {replayed} spilled quiz_history rows.")
+
+    def close(self):
+        # 종료 시 큐에 남은 행을 모두 저장 (실패하면 파일로)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self._flush_interval + 5)
+        while True:
+            with self._cond:
+                batch = self._take_batch_locked()
+            if not batch:
+                break
+            self._write(batch)
+
+    def stats(self):
+        with self._cond:
+            return {**self.stats_counts, 'pending': len(self._queue), 'spill_pending': self._spill_pending}
+
+history_writer = HistoryWriter(HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_QUEUE_MAX, HISTORY_SPILL_PATH,
+                               HISTORY_QUARANTINE_PATH)
+atexit.register(history_writer.close)
 
 # --- 사용자 회원가입 ---
-@app.route('/signup', methods=['POST'])
+@bp.route('/signup', methods=['POST'])
 def signup():
     data = request.json
     email = data.get('email')
@@ -170,7 +1569,7 @@ def signup():
     if not email or not password:
         return jsonify({"success": False, "message": "이메일과 비밀번호를 모두 입력해주세요."}), 400
 
-    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    password_hash = password_hasher.hash(password)
     signup_date = datetime.now().date()
 
     try:
@@ -183,14 +1582,13 @@ def signup():
             conn.commit()
         return jsonify({"success": True, "message": "회원가입이 완료되었습니다! 로그인해주세요."})
     except psycopg2.IntegrityError:
-        conn.rollback()
         return jsonify({"success": False, "message": "이미 사용 중인 이메일입니다."}), 409
     except Exception as e:
         traceback.print_exc()
         return jsonify({"success": False, "message": "서버 오류가 발생했습니다."}), 500
 
 # --- 로그인 ---
-@app.route('/login', methods=['POST'])
+@bp.route('/login', methods=['POST'])
 def login():
     data = request.json
     email = data.get('email')
@@ -204,9 +1602,12 @@ def login():
     if not user:
         return jsonify({"success": False, "message": "존재하지 않는 사용자입니다."}), 404
 
-    if not bcrypt.checkpw(password.encode(), user['password_hash'].encode()):
+    if not password_hasher.check(password, user['password_hash']):
         return jsonify({"success": False, "message": "이메일 또는 비밀번호가 올바르지 않습니다."}), 401
 
+    if password_hasher.needs_rehash(user['password_hash']):
+        password_hasher.rehash_in_background(email, password, user['password_hash'])
+
     signup_date = user['signup_date']
     if isinstance(signup_date, datetime):
         signup_date = signup_date.date()
@@ -217,103 +1618,723 @@ def login():
     return jsonify({"success": True, "message": "로그인 성공! 환영합니다."})
 
 # --- 파트 리스트 ---
-@app.route('/api/parts', methods=['GET'])
+@bp.route('/api/parts', methods=['GET'])
 def get_parts():
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            cursor.execute("SELECT * FROM parts ORDER BY id")
-            parts = cursor.fetchall()
-    return jsonify([dict(row) for row in parts])
+    return prepared_json_response(question_cache.get_parts()['response'])
 
 # --- 문제 목록 가져오기 ---
-@app.route('/get-questions', methods=['GET'])
+@bp.route('/get-questions', methods=['GET'])
 def get_questions():
     part_name = request.args.get('part')
     if not part_name:
         return jsonify({"error": "Part name is required"}), 400
 
-    questions_list = []
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            cursor.execute("SELECT id FROM parts WHERE name = %s", (part_name,))
-            part = cursor.fetchone()
-            if not part:
-                return jsonify({"error": "Part not found"}), 404
-            part_id = part['id']
-            cursor.execute("SELECT * FROM questions WHERE part_id = %s ORDER BY display_order", (part_id,))
-            questions = cursor.fetchall()
-
-    for q in questions:
-        question_dict = dict(q)
-        question_dict['options'] = json.loads(question_dict['options'])
-        questions_list.append(question_dict)
-    return jsonify(questions_list)
+    part = question_cache.get_part(part_name)
+    if part is None:
+        return jsonify({"error": "Part not found"}), 404
+    return prepared_json_response(part['response'])
 
 # --- 퀴즈 제출 ---
-@app.route('/submit-quiz', methods=['POST'])
+@bp.route('/submit-quiz', methods=['POST'])
 def submit_quiz():
     data = request.json
     user_email = data.get('user')
     user_answers = data.get('answers')
     part_name = data.get('part')
+    # 맞춤 복습 퀴즈는 여러 파트의 문제가 섞여 있으므로 parts 목록으로 받는다
+    part_names = data.get('parts') or ([part_name] if part_name else [])
 
-    if not all([user_email, user_answers, part_name]):
+    if not all([user_email, user_answers, part_names]):
         return jsonify({"error": "필수 데이터가 누락되었습니다."}), 400
+    # 잘못된 타입의 값이 기록 저장 배치에 섞이면 같은 배치의 다른 행까지 저장에 실패하므로 여기서 거른다
+    if (not _is_user_and_parts(user_email, part_names) or not isinstance(user_answers, list)
+            or not all(_is_valid_answer(a) for a in user_answers)):
+        return jsonify({"error": "잘못된 데이터 형식입니다."}), 400
+
+    answer_key = _merged_answer_key(part_names)
+    if not answer_key:
+        return jsonify({"error": "해당 파트의 문제를 찾을 수 없습니다."}), 404
+
+    graded = []
+    for answer in user_answers:
+        key = answer_key.get(answer['questionId'])
+        if key:
+            graded.append((answer['questionId'], answer['answer'] == key['correct_text'], answer['answer']))
+
+    return jsonify(record_quiz_attempt(user_email, part_name or ' + '.join(part_names), answer_key, graded, len(user_answers)))
+
+def _is_user_and_parts(user_email, part_names):
+    return (isinstance(user_email, str) and isinstance(part_names, list)
+            and all(isinstance(p, str) for p in part_names))
 
+def _is_valid_answer(answer):
+    return (isinstance(answer, dict) and isinstance(answer.get('questionId'), int)
+            and not isinstance(answer['questionId'], bool) and isinstance(answer.get('answer'), str))
+
+def _merged_answer_key(part_names):
+    answer_key = {}
+    for name in part_names:
+        part = question_cache.get_part(name)
+        if part:
+            answer_key.update(part['answer_key'])
+    return answer_key
+
+def record_quiz_attempt(user_email, part_name, answer_key, graded, total):
+    result, question_results = score_quiz_attempt(answer_key, graded, total)
+    save_quiz_attempt(user_email, part_name, result, question_results)
+    return result
+
+def score_quiz_attempt(answer_key, graded, total):
+    # graded: (문제 id, 정답 여부, 사용자가 고른 보기) 목록. 응답 본문과 기록 저장용 문제별 결과를 돌려준다
     score = 0
     topic_analysis = {}
+    question_results = []
+    results = []
+    for question_id, is_correct, user_answer in graded:
+        key = answer_key[question_id]
+        question_results.append([question_id, is_correct])
+        results.append({"questionId": question_id, "isCorrect": is_correct,
+                        "userAnswer": user_answer, "correctAnswer": key['correct_text']})
 
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            cursor.execute("SELECT q.* FROM questions q JOIN parts p ON q.part_id = p.id WHERE p.name = %s", (part_name,))
-            questions = {q['id']: q for q in cursor.fetchall()}
-            if not questions:
-                return jsonify({"error": "해당 파트의 문제를 찾을 수 없습니다."}), 404
-
-            for answer in user_answers:
-                q_id = answer['questionId']
-                question = questions.get(q_id)
-                if not question:
-                    continue
+        topic = key['topic']
+        if topic not in topic_analysis:
+            topic_analysis[topic] = {'correct': 0, 'total': 0}
+        topic_analysis[topic]['total'] += 1
+        if is_correct:
+            topic_analysis[topic]['correct'] += 1
+            score += 1
+
+    return {"score": score, "total": total, "analysis": topic_analysis, "results": results}, question_results
+
+def save_quiz_attempt(user_email, part_name, result, question_results):
+    history_writer.submit(
+        user_email, datetime.now(), result['score'], result['total'], part_name,
+        {topic: [t['correct'], t['total']] for topic, t in result['analysis'].items()}, question_results
+    )
+
+# --- 서버 측 퀴즈 세션 (답안을 한 문제씩 저장하고 이어 풀기) ---
+QUIZ_SESSION_TTL = int(os.environ.get('QUIZ_SESSION_TTL', str(3 * 3600)))  # 마지막 저장 이후 유지 시간(초)
+QUIZ_SESSION_MAX = int(os.environ.get('QUIZ_SESSION_MAX', '50000'))        # 메모리 저장소의 최대 세션 수
+QUIZ_SESSION_CLEANUP_INTERVAL = int(os.environ.get('QUIZ_SESSION_CLEANUP_INTERVAL', '300'))  # 만료 세션 삭제 주기(초)
+REDIS_URL = os.environ.get('REDIS_URL')
+# postgres(기본) 또는 redis는 모든 워커가 함께 본다. memory는 워커 하나로 돌릴 때와 테스트용
+QUIZ_SESSION_STORE = os.environ.get('QUIZ_SESSION_STORE', 'redis' if REDIS_URL else 'postgres')
+UNANSWERED = 0xFF  # 답안은 문제당 1바이트(고른 보기 번호)로 저장하고, 이 값이면 미응답
+SESSION_NOT_FOUND = {"error": "세션이 만료되었거나 존재하지 않습니다."}
+
+# 저장소는 모두 같은 메서드를 가진다. get()은 (meta, 답안 바이트, 채점 결과 또는 None)을 돌려주고,
+# finish()는 처음 제출한 결과만 남긴 뒤 (남은 결과, 이번 호출이 제출했는지)를 돌려준다.
+# 제출한 세션도 TTL 동안 남겨 두어 같은 제출을 다시 보내면 같은 결과를 돌려준다.
+
+
+class MemorySessionStore:
+    # 프로세스 안에서만 공유되므로 gunicorn 워커가 하나일 때만 쓴다
+    def __init__(self, ttl, max_sessions):
+        self._ttl = ttl
+        self._max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # id -> [만료 시각, meta, bytearray, 결과], 오래 안 쓴 순서
+
+    def _evict_locked(self, now):
+        while self._sessions:
+            expires_at = next(iter(self._sessions.values()))[0]
+            if expires_at > now and len(self._sessions) <= self._max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def _touch_locked(self, session_id):
+        now = time.monotonic()
+        self._evict_locked(now)
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            entry[0] = now + self._ttl
+            self._sessions.move_to_end(session_id)
+        return entry
+
+    def create(self, session_id, meta, size):
+        with self._lock:
+            self._sessions[session_id] = [time.monotonic() + self._ttl, meta, bytearray([UNANSWERED]) * size, None]
+            self._evict_locked(time.monotonic())
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._touch_locked(session_id)
+            return (entry[1], bytes(entry[2]), entry[3]) if entry else None
+
+    def set_answer(self, session_id, position, value):
+        with self._lock:
+            entry = self._touch_locked(session_id)
+            if entry is None or entry[3] is not None:
+                return False
+            entry[2][position] = value
+            return True
+
+    def finish(self, session_id, result):
+        with self._lock:
+            entry = self._touch_locked(session_id)
+            if entry is None:
+                return None, False
+            if entry[3] is not None:
+                return entry[3], False
+            entry[3] = result
+            return result, True
+
+
+class PostgresSessionStore:
+    # 워커와 인스턴스가 모두 같은 테이블을 본다. 만료된 행은 create 때 QUIZ_SESSION_CLEANUP_INTERVAL마다 지운다
+    def __init__(self, ttl, cleanup_interval):
+        self._ttl = ttl
+        self._cleanup_interval = cleanup_interval
+        self._lock = threading.Lock()
+        self._cleaned_at = float('-inf')
+
+    def _cleanup(self, cursor):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._cleaned_at < self._cleanup_interval:
+                return
+            self._cleaned_at = now  # 동시에 여러 스레드가 지우러 가지 않도록 먼저 갱신
+        cursor.execute("DELETE FROM quiz_sessions WHERE expires_at <= NOW()")
+
+    def create(self, session_id, meta, size):
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                self._cleanup(cursor)
+                cursor.execute(
+                    "INSERT INTO quiz_sessions (session_id, meta, answers, expires_at) "
+                    "VALUES (%s, %s, %s, NOW() + %s * INTERVAL '1 second')",
+                    (session_id, psycopg2.extras.Json(meta), psycopg2.Binary(bytes([UNANSWERED]) * size), self._ttl)
+                )
+
+    def get(self, session_id):
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE quiz_sessions SET expires_at = NOW() + %s * INTERVAL '1 second'
+                    WHERE session_id = %s AND expires_at > NOW()
+                    RETURNING meta, answers, result
+                    """,
+                    (self._ttl, session_id)
+                )
+                row = cursor.fetchone()
+        return (row[0], bytes(row[1]), row[2]) if row else None
+
+    def set_answer(self, session_id, position, value):
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE quiz_sessions
+                    SET answers = set_byte(answers, %s, %s), expires_at = NOW() + %s * INTERVAL '1 second'
+                    WHERE session_id = %s AND expires_at > NOW() AND result IS NULL
+                    """,
+                    (position, value, self._ttl, session_id)
+                )
+                return cursor.rowcount == 1
+
+    def finish(self, session_id, result):
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                # 동시에 두 번 제출되면 나중 UPDATE는 행 잠금을 기다린 뒤 result IS NULL 조건에서 빠진다
+                cursor.execute(
+                    """
+                    UPDATE quiz_sessions SET result = %s, expires_at = NOW() + %s * INTERVAL '1 second'
+                    WHERE session_id = %s AND expires_at > NOW() AND result IS NULL
+                    """,
+                    (psycopg2.extras.Json(result), self._ttl, session_id)
+                )
+                if cursor.rowcount == 1:
+                    return result, True
+                cursor.execute(
+                    "SELECT result FROM quiz_sessions WHERE session_id = %s AND expires_at > NOW()", (session_id,)
+                )
+                row = cursor.fetchone()
+        return (row[0] if row else None), False
+
+
+class RedisSessionStore:
+    # meta와 결과는 JSON 문자열, 답안은 별도 키의 바이트 문자열 (SETRANGE로 한 바이트씩 갱신)
+    def __init__(self, client, ttl, prefix='quiz-session:'):
+        self._redis = client
+        self._ttl = ttl
+        self._prefix = prefix
+
+    def _keys(self, session_id):
+        key = self._prefix + session_id
+        return key, key + ':answers', key + ':result'
+
+    def create(self, session_id, meta, size):
+        meta_key, answers_key, _ = self._keys(session_id)
+        pipe = self._redis.pipeline()
+        pipe.set(meta_key, json.dumps(meta), ex=self._ttl)
+        pipe.set(answers_key, bytes([UNANSWERED]) * size, ex=self._ttl)
+        pipe.execute()
+
+    def get(self, session_id):
+        keys = self._keys(session_id)
+        pipe = self._redis.pipeline()
+        pipe.mget(*keys)
+        for key in keys:
+            pipe.expire(key, self._ttl)
+        (meta, answers, result), *_ = pipe.execute()
+        if meta is None:
+            return None
+        return json.loads(meta), answers or b'', json.loads(result) if result is not None else None
+
+    def set_answer(self, session_id, position, value):
+        meta_key, answers_key, result_key = self._keys(session_id)
+        if self._redis.exists(result_key) or not self._redis.expire(meta_key, self._ttl):
+            return False
+        pipe = self._redis.pipeline()
+        pipe.setrange(answers_key, position, bytes([value]))
+        pipe.expire(answers_key, self._ttl)
+        pipe.execute()
+        return True
+
+    def finish(self, session_id, result):
+        meta_key, _, result_key = self._keys(session_id)
+        if not self._redis.expire(meta_key, self._ttl):
+            return None, False
+        # SET NX: 동시에 두 번 제출되어도 처음 것만 저장된다
+        if self._redis.set(result_key, json.dumps(result), ex=self._ttl, nx=True):
+            return result, True
+        stored = self._redis.get(result_key)
+        return (json.loads(stored) if stored is not None else None), False
+
+
+_session_store = None
 
-                correct_index = question['answer']
-                correct_text = json.loads(question['options'])[correct_index]
-                is_correct = (answer['answer'] == correct_text)
+def get_session_store():
+    global _session_store
+    if _session_store is None:
+        if QUIZ_SESSION_STORE == 'redis':
+            if redis is None:
+                raise RuntimeError("QUIZ_SESSION_STORE=redis needs the redis package")
+            if not REDIS_URL:
+                raise RuntimeError("QUIZ_SESSION_STORE=redis needs REDIS_URL")
+            _session_store = RedisSessionStore(redis.Redis.from_url(REDIS_URL), QUIZ_SESSION_TTL)
+        elif QUIZ_SESSION_STORE == 'memory':
+            _session_store = MemorySessionStore(QUIZ_SESSION_TTL, QUIZ_SESSION_MAX)
+        elif QUIZ_SESSION_STORE == 'postgres':
+            _session_store = PostgresSessionStore(QUIZ_SESSION_TTL, QUIZ_SESSION_CLEANUP_INTERVAL)
+        else:
+            raise RuntimeError(f"unknown QUIZ_SESSION_STORE: {QUIZ_SESSION_STORE}")
+    return _session_store
 
-                topic = question['topic']
-                if topic not in topic_analysis:
-                    topic_analysis[topic] = {'correct': 0, 'total': 0}
-                topic_analysis[topic]['total'] += 1
-                if is_correct:
-                    topic_analysis[topic]['correct'] += 1
-                    score += 1
+def _session_response(session_id, meta, answers, result=None):
+    question_ids = [q['id'] for q in meta['questions']]
+    response = {
+        "session_id": session_id,
+        "parts": meta['parts'],
+        "questions": meta['questions'],
+        "answers": {str(q_id): answers[i] for i, q_id in enumerate(question_ids) if answers[i] != UNANSWERED},
+        "expires_in": QUIZ_SESSION_TTL,
+    }
+    if result is not None:
+        response["result"] = result  # 이미 제출한 세션
+    return response
 
+def _get_owned_session(session_id, user_email):
+    # 다른 사용자의 세션은 없는 것으로 취급한다 (공용 PC에서 앞 사람의 세션을 이어 풀거나 대신 제출하지 않도록)
+    session = get_session_store().get(session_id)
+    if session is None or not isinstance(user_email, str) or session[0]['user'] != user_email:
+        return None
+    return session
+
+@bp.route('/quiz-sessions', methods=['POST'])
+def start_quiz_session():
+    data = request.json
+    user_email = data.get('user')
+    part_names = data.get('parts') or ([data['part']] if data.get('part') else [])
+    if not user_email or not part_names:
+        return jsonify({"error": "필수 데이터가 누락되었습니다."}), 400
+    if not _is_user_and_parts(user_email, part_names):
+        return jsonify({"error": "잘못된 데이터 형식입니다."}), 400
+
+    questions = {}
+    for name in part_names:
+        part = question_cache.get_part(name)
+        if part is None:
+            return jsonify({"error": "Part not found", "part": name}), 404
+        questions.update((q['id'], q) for q in part['questions'])
+    if not questions:
+        return jsonify({"error": "해당 파트의 문제가 없습니다."}), 404
+
+    # 시작할 때의 문제와 정답을 세션에 함께 저장한다 (도중에 문제를 다시 가져와도 같은 시험지로 채점)
+    session_id = secrets.token_urlsafe(16)
+    meta = {'user': user_email, 'parts': part_names, 'questions': list(questions.values())}
+    get_session_store().create(session_id, meta, len(questions))
+    return jsonify(_session_response(session_id, meta, bytes([UNANSWERED]) * len(questions))), 201
+
+@bp.route('/quiz-sessions/<session_id>', methods=['GET'])
+def get_quiz_session(session_id):
+    session = _get_owned_session(session_id, request.args.get('user'))
+    if session is None:
+        return jsonify(SESSION_NOT_FOUND), 404
+    return jsonify(_session_response(session_id, *session))
+
+@bp.route('/quiz-sessions/<session_id>', methods=['PATCH'])
+def save_quiz_answer(session_id):
+    # 같은 값을 여러 번 보내도 결과가 같다 (option이 null이면 답을 지움)
+    data = request.json
+    question_id = data.get('questionId')
+    option = data.get('option')
+
+    session = _get_owned_session(session_id, data.get('user'))
+    if session is None:
+        return jsonify(SESSION_NOT_FOUND), 404
+    meta, _, result = session
+    if result is not None:
+        return jsonify({"error": "이미 제출한 세션입니다."}), 409
+    position = next((i for i, q in enumerate(meta['questions']) if q['id'] == question_id), None)
+    if position is None or isinstance(question_id, bool):
+        return jsonify({"error": "이 세션의 문제가 아닙니다."}), 400
+
+    if option is None:
+        value = UNANSWERED
+    else:
+        if not isinstance(option, int) or isinstance(option, bool) \
+                or not 0 <= option < min(len(meta['questions'][position]['options']), UNANSWERED):
+            return jsonify({"error": "잘못된 보기 번호입니다."}), 400
+        value = option
+
+    if not get_session_store().set_answer(session_id, position, value):
+        # 확인한 뒤에 만료되었거나 다른 요청이 먼저 제출한 경우
+        return jsonify(SESSION_NOT_FOUND), 404
+    return jsonify({"success": True})
+
+@bp.route('/quiz-sessions/<session_id>/finalize', methods=['POST'])
+def finalize_quiz_session(session_id):
+    # 응답을 받지 못해 다시 보내도 기록은 한 번만 남고 처음 채점 결과를 그대로 돌려준다
+    data = request.get_json(silent=True) or {}
+    session = _get_owned_session(session_id, data.get('user'))
+    if session is None:
+        return jsonify(SESSION_NOT_FOUND), 404
+    meta, answers, result = session
+    if result is not None:
+        return jsonify(result)
+
+    answer_key = build_answer_key(meta['questions'])
+    graded = []
+    for position, question in enumerate(meta['questions']):
+        option = answers[position]
+        if option == UNANSWERED or option >= len(question['options']):
+            continue
+        graded.append((question['id'], option == question['answer'], question['options'][option]))
+
+    result, question_results = score_quiz_attempt(answer_key, graded, len(graded))
+    stored, finished = get_session_store().finish(session_id, result)
+    if stored is None:
+        return jsonify(SESSION_NOT_FOUND), 404
+    if finished:
+        save_quiz_attempt(meta['user'], ' + '.join(meta['parts']), result, question_results)
+    return jsonify(stored)
+
+# --- 맞춤 복습 퀴즈 ---
+ADAPTIVE_DEFAULT_COUNT = int(os.environ.get('ADAPTIVE_DEFAULT_COUNT', '20'))
+ADAPTIVE_MAX_COUNT = int(os.environ.get('ADAPTIVE_MAX_COUNT', '100'))
+
+def _adaptive_priority(state, topic_weakness, now):
+    # 높을수록 먼저 출제: 복습 시점이 지난 문제 > 처음 보는 문제 > 아직 복습 시점이 아닌 문제
+    if state is None:
+        return 1.0 + topic_weakness + random.random() * 0.5
+    attempts, correct, due_at = state
+    miss_rate = 1.0 - correct / attempts if attempts else 0.5
+    hours_from_due = (now - due_at).total_seconds() / 3600
+    if hours_from_due >= 0:
+        return 2.0 + min(hours_from_due / 72, 1.0) + miss_rate + topic_weakness
+    return (miss_rate + topic_weakness) / 2 - min(-hours_from_due / 720, 1.0)
+
+@bp.route('/get-adaptive-quiz', methods=['POST'])
+def get_adaptive_quiz():
+    data = request.json
+    user_email = data.get('user')
+    part_names = data.get('parts') or ([data['part']] if data.get('part') else [])
+    if not user_email or not part_names:
+        return jsonify({"error": "필수 데이터가 누락되었습니다."}), 400
+    if not _is_user_and_parts(user_email, part_names):
+        return jsonify({"error": "잘못된 데이터 형식입니다."}), 400
+    try:
+        count = min(max(int(data.get('count') or ADAPTIVE_DEFAULT_COUNT), 1), ADAPTIVE_MAX_COUNT)
+    except (TypeError, ValueError):
+        return jsonify({"error": "count must be a number"}), 400
+
+    candidates = []
+    for name in part_names:
+        part = question_cache.get_part(name)
+        if part is None:
+            return jsonify({"error": "Part not found", "part": name}), 404
+        candidates.extend((name, q) for q in part['questions'])
+
+    # 문제 본문은 캐시에서, 사용자 상태는 인덱스로 두 번만 읽는다
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
             cursor.execute(
-                "INSERT INTO quiz_history (user_email, date, score, total, part) VALUES (%s, %s, %s, %s, %s)",
-                (user_email, datetime.now(), score, len(user_answers), part_name)
+                "SELECT question_id, attempts, correct, due_at FROM user_question_state WHERE user_email = %s",
+                (user_email,)
             )
-        conn.commit()
+            states = {question_id: (attempts, correct, due_at) for question_id, attempts, correct, due_at in cursor.fetchall()}
+            cursor.execute("SELECT topic, correct, total FROM user_topic_stats WHERE user_email = %s", (user_email,))
+            weakness = {topic: 1.0 - correct / total for topic, correct, total in cursor.fetchall() if total}
 
-    return jsonify({"score": score, "total": len(user_answers), "analysis": topic_analysis})
+    now = datetime.now()
+    picked = heapq.nlargest(
+        count, candidates,
+        key=lambda c: _adaptive_priority(states.get(c[1]['id']), weakness.get(c[1]['topic'], 0.5), now)
+    )
+    return jsonify([{**q, 'part': name} for name, q in picked])
 
 # --- 히스토리 ---
-@app.route('/get-history', methods=['POST'])
+HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE', '20'))
+HISTORY_PAGE_MAX = int(os.environ.get('HISTORY_PAGE_MAX', '100'))
+
+def encode_history_cursor(date, row_id):
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{row_id}".encode()).decode()
+
+def decode_history_cursor(cursor):
+    if not cursor:
+        return None
+    date, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(date), int(row_id)
+
+@bp.route('/get-history', methods=['POST'])
 def get_history():
     user_email = request.json.get('user')
-    if not user_email:
+    if not user_email or not isinstance(user_email, str):
         return jsonify({"error": "User email is required"}), 400
 
+    # limit/cursor 없이 호출하면 예전처럼 전체 목록을 배열로 돌려준다
+    paginated = 'limit' in request.json or 'cursor' in request.json
+    if not paginated:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+                cursor.execute("SELECT * FROM quiz_history WHERE user_email = %s ORDER BY date DESC, id DESC", (user_email,))
+                history = cursor.fetchall()
+        return jsonify([dict(row) for row in history])
+
+    try:
+        limit = min(max(int(request.json.get('limit') or HISTORY_PAGE_SIZE), 1), HISTORY_PAGE_MAX)
+        after = decode_history_cursor(request.json.get('cursor'))
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({"error": "잘못된 페이지 요청입니다."}), 400
+
     with get_db_connection() as conn:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            cursor.execute("SELECT * FROM quiz_history WHERE user_email = %s ORDER BY date DESC", (user_email,))
+            if after:
+                cursor.execute(
+                    """
+                    SELECT * FROM quiz_history
+                    WHERE user_email = %s AND (date, id) < (%s, %s)
+                    ORDER BY date DESC, id DESC LIMIT %s
+                    """,
+                    (user_email, after[0], after[1], limit + 1)
+                )
+            else:
+                cursor.execute(
+                    "SELECT * FROM quiz_history WHERE user_email = %s ORDER BY date DESC, id DESC LIMIT %s",
+                    (user_email, limit + 1)
+                )
             history = cursor.fetchall()
-    return jsonify([dict(row) for row in history])
 
-@app.route('/')
+    next_cursor = None
+    if len(history) > limit:
+        history = history[:limit]
+        next_cursor = encode_history_cursor(history[-1]['date'], history[-1]['id'])
+    return jsonify({"items": [dict(row) for row in history], "next_cursor": next_cursor})
+
+# --- 파트별 성적 요약 ---
+@bp.route('/get-history-summary', methods=['POST'])
+def get_history_summary():
+    user_email = request.json.get('user')
+    if not user_email or not isinstance(user_email, str):
+        return jsonify({"error": "User email is required"}), 400
+
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+            cursor.execute("SELECT * FROM user_part_stats WHERE user_email = %s ORDER BY part", (user_email,))
+            stats = cursor.fetchall()
+
+    summary = []
+    for row in stats:
+        recent = row['recent_pcts']
+        # 추세: 가장 최근 점수가 그 이전 최근 응시 평균보다 얼마나 높은지 (%p)
+        trend = round(recent[0] - sum(recent[1:]) / len(recent[1:]), 1) if len(recent) > 1 else None
+        summary.append({
+            "part": row['part'],
+            "attempts": row['attempts'],
+            "best_pct": round(row['best_pct'], 1),
+            "avg_pct": round(row['pct_sum'] / row['attempts'], 1),
+            "avg_score": round(row['score_sum'] / row['attempts'], 1),
+            "avg_total": round(row['total_sum'] / row['attempts'], 1),
+            "last_pct": round(row['last_pct'], 1),
+            "last_date": row['last_date'],
+            "recent_pcts": [round(p, 1) for p in recent],
+            "trend": trend,
+        })
+    return jsonify(summary)
+
+# --- 취약 주제 분석 ---
+WEAK_TOPICS_LIMIT = int(os.environ.get('WEAK_TOPICS_LIMIT', '5'))
+
+def _accuracy(correct, total):
+    return round(correct * 100.0 / total, 1) if total else None
+
+@bp.route('/get-weak-topics', methods=['POST'])
+def get_weak_topics():
+    user_email = request.json.get('user')
+    if not user_email or not isinstance(user_email, str):
+        return jsonify({"error": "User email is required"}), 400
+    try:
+        limit = max(int(request.json.get('limit') or WEAK_TOPICS_LIMIT), 1)
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be a number"}), 400
+
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT u.topic, u.correct, u.total, t.correct AS global_correct, t.total AS global_total
+                FROM user_topic_stats u LEFT JOIN topic_stats t ON t.topic = u.topic
+                WHERE u.user_email = %s
+                """,
+                (user_email,)
+            )
+            rows = cursor.fetchall()
+
+    topics = [{
+        "topic": row['topic'],
+        "correct": row['correct'],
+        "total": row['total'],
+        "accuracy": _accuracy(row['correct'], row['total']),
+        "global_accuracy": _accuracy(row['global_correct'] or 0, row['global_total'] or 0),
+    } for row in rows]
+    # 정답률이 낮은 순, 같으면 많이 풀어본 주제부터
+    topics.sort(key=lambda t: (t['accuracy'], -t['total']))
+    return jsonify(topics[:limit])
+
+# --- 문제별 난이도 (전체 사용자 정답률) ---
+@bp.route('/api/question-difficulty', methods=['GET'])
+def get_question_difficulty():
+    part_name = request.args.get('part')
+    if not part_name:
+        return jsonify({"error": "Part name is required"}), 400
+    part = question_cache.get_part(part_name)
+    if part is None:
+        return jsonify({"error": "Part not found"}), 404
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT question_id, correct, total FROM question_stats WHERE question_id = ANY(%s)",
+                ([q['id'] for q in part['questions']],)
+            )
+            stats = {question_id: (correct, total) for question_id, correct, total in cursor.fetchall()}
+
+    difficulty = []
+    for q in part['questions']:
+        correct, total = stats.get(q['id'], (0, 0))
+        difficulty.append({
+            "id": q['id'], "question": q['question'], "topic": q['topic'],
+            "correct": correct, "total": total, "accuracy": _accuracy(correct, total),
+        })
+    # 아직 아무도 풀지 않은 문제는 맨 뒤로
+    difficulty.sort(key=lambda d: (d['accuracy'] is None, d['accuracy'] or 0))
+    return jsonify(difficulty)
+
+# --- 문제 일괄 가져오기/내보내기 API (X-Admin-Token 헤더 필요) ---
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def _is_admin():
+    token = request.headers.get('X-Admin-Token')
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+@bp.route('/api/questions/import', methods=['POST'])
+def import_questions_api():
+    if not _is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'jsonl')
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+    try:
+        summary = import_questions(read_question_file(stream, fmt), skip_invalid=request.args.get('skip_invalid') == '1')
+    except QuestionImportError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(summary)
+
+@bp.route('/api/questions/export', methods=['GET'])
+def export_questions_api():
+    if not _is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({"error": f"unsupported format: {fmt}"}), 400
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(export_questions(fmt, request.args.get('part')), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=questions.{fmt}'})
+
+# --- DB 지표 (X-Admin-Token 헤더 필요) ---
+@bp.route('/api/db-metrics', methods=['GET'])
+def get_db_metrics():
+    if not _is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({"pool": get_pool().stats(), "question_cache": question_cache.stats(),
+                    "history_writer": history_writer.stats(), **db_metrics.snapshot()})
+
+@bp.app_errorhandler(HashingBusy)
+def handle_hashing_busy(e):
+    return jsonify({"success": False, "message": "로그인 요청이 많습니다. 잠시 후 다시 시도해주세요."}), 503, {"Retry-After": str(HASH_RETRY_AFTER)}
+
+@bp.app_errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    return jsonify({"error": "서버가 혼잡합니다. 잠시 후 다시 시도해주세요."}), 503, {"Retry-After": "1"}
+
+@bp.route('/')
 def home():
     return 'Flask App is running.'
 
+# --- 준비 상태 확인 (로드밸런서/배포 헬스체크용) ---
+@bp.route('/readyz', methods=['GET'])
+def readyz():
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+                schema_version = cursor.fetchone()[0]
+    except psycopg2.errors.UndefinedTable:
+        schema_version = 0
+    except (psycopg2.Error, PoolTimeout):
+        return jsonify({"ready": False, "reason": "database unavailable"}), 503
+    if schema_version < SCHEMA_VERSION:
+        return jsonify({"ready": False, "reason": "migrations pending",
+                        "schema_version": schema_version, "expected": SCHEMA_VERSION}), 503
+    return jsonify({"ready": True, "schema_version": schema_version,
+                    "startup_ms": current_app.config['STARTUP_MS'], "pid": os.getpid()})
+
+# --- 배포 시 1회 실행: 스키마 마이그레이션 + 초기 데이터 ---
+@bp.cli.command('migrate')
+@click.option('--seed/--no-seed', default=True, help="문제 테이블이 비어 있으면 seed_questions.jsonl로 채운다")
+def migrate_command(seed):
+    start = time.perf_counter()
+    version = run_migrations()
+    if seed:
+        populate_db_if_empty()
+    click.echo(f"Database at schema version {version} ({(time.perf_counter() - start) * 1000:.0f}ms)")
+
+# --- 앱 팩토리 ---
+def create_app():
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(bp)
+    # 모듈 로딩부터 앱 생성까지 걸린 시간 (DB 연결은 첫 요청 때 풀에서 연다)
+    app.config['STARTUP_MS'] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+    print(f"App created in {app.config['STARTUP_MS']}ms (pid {os.getpid()})")
+    return app
+
+app = create_app()
+
 # 로컬 실행용
 if __name__ == '__main__':
+    run_migrations()
+    populate_db_if_empty()
     app.run(debug=True)
 
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# seed.py와 loadtest.py가 같이 쓰는 벤치 사용자 규칙
+BENCH_PASSWORD = 'bench-password'
+
+
+def bench_email(n):
+    return f"bench{n}@example.com"
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+# 시험일 트래픽을 흉내 내는 부하 테스트 (bench/seed.py로 만든 데이터 기준)
+#
+#   gunicorn -w 4 app:app &
+#   python bench/loadtest.py --url http://localhost:8000 --users 100000 --duration 60 --out run.json
+#
+# 회귀 검사: 기준 결과와 비교해 p99 지연이나 처리량이 --max-regression 이상 나빠지면 종료 코드 1
+#
+#   python bench/loadtest.py --save-baseline bench/baseline.json ...
+#   python bench/loadtest.py --baseline bench/baseline.json ...
+import argparse
+import gzip
+import http.client
+import json
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from common import BENCH_PASSWORD, bench_email
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIX = 'login=10,parts=10,get-questions=30,submit-quiz=30,get-history=20'
+ACCEPT_ENCODING = 'br, gzip' if brotli is not None else 'gzip'
+SERVER_TIMING_DB = re.compile(r'db;desc="(\d+) queries";dur=([\d.]+)')
+
+
+class Client:
+    # 스레드마다 keep-alive 연결 하나를 재사용한다
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        conn_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._make = lambda: conn_class(parts.netloc, timeout=timeout)
+        self._conn = self._make()
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {'Accept-Encoding': ACCEPT_ENCODING, 'Content-Type': 'application/json'}
+        start = time.perf_counter()
+        try:
+            self._conn.request(method, path, body=body, headers=headers)
+            response = self._conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self._conn.close()
+            self._conn = self._make()
+            return None, {}, b'', (time.perf_counter() - start) * 1000
+        return response.status, dict(response.getheaders()), data, (time.perf_counter() - start) * 1000
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.db_queries = 0
+        self.db_ms = 0.0
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        name, weight = item.split('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(REQUESTS)
+    if unknown:
+        raise ValueError(f"unknown endpoints in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+# --- 엔드포인트별 요청 만들기 ---
+def _login(ctx, rng):
+    return 'POST', '/login', {'email': bench_email(ctx.pick_user(rng)), 'password': BENCH_PASSWORD}
+
+def _parts(ctx, rng):
+    return 'GET', '/api/parts', None
+
+def _get_questions(ctx, rng):
+    return 'GET', f"/get-questions?part={quote(rng.choice(ctx.part_names))}", None
+
+def _submit_quiz(ctx, rng):
+    part = rng.choice(ctx.part_names)
+    answers = [{'questionId': q['id'], 'answer': rng.choice(q['options'])} for q in ctx.bank[part]]
+    return 'POST', '/submit-quiz', {'user': bench_email(ctx.pick_user(rng)), 'part': part, 'answers': answers}
+
+def _get_history(ctx, rng):
+    return 'POST', '/get-history', {'user': bench_email(ctx.pick_user(rng)), 'limit': 20}
+
+REQUESTS = {
+    'login': _login,
+    'parts': _parts,
+    'get-questions': _get_questions,
+    'submit-quiz': _submit_quiz,
+    'get-history': _get_history,
+}
+
+
+class Context:
+    def __init__(self, users, bank):
+        self.users = users
+        self.bank = bank
+        self.part_names = sorted(bank)
+
+    def pick_user(self, rng):
+        # seed.py와 같은 분포: 기록이 많은 사용자가 더 자주 접속
+        return int(self.users * rng.random() ** 2)
+
+
+def load_bank(client):
+    status, headers, data, _ = client.request('GET', '/api/parts')
+    if status != 200:
+        sys.exit(f"GET /api/parts failed with {status}")
+    bank = {}
+    for part in _decode(data, headers):
+        status, headers, data, _ = client.request('GET', f"/get-questions?part={quote(part['name'])}")
+        if status == 200:
+            bank[part['name']] = _decode(data, headers)
+    if not bank:
+        sys.exit("no questions found; run bench/seed.py first")
+    return bank
+
+
+def _decode(data, headers):
+    encoding = headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    elif encoding == 'br':
+        data = brotli.decompress(data)
+    return json.loads(data)
+
+
+def run(args):
+    mix = parse_mix(args.mix)
+    ctx = Context(args.users, load_bank(Client(args.url, args.timeout)))
+    names, weights = list(mix), list(mix.values())
+    stats = {name: EndpointStats() for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = Client(args.url, args.timeout)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, payload = REQUESTS[name](ctx, rng)
+            status, headers, _, elapsed_ms = client.request(method, path, payload)
+            match = SERVER_TIMING_DB.search(headers.get('Server-Timing', ''))
+            with lock:
+                stat = stats[name]
+                stat.latencies.append(elapsed_ms)
+                if status is None or status >= 500:
+                    stat.errors += 1
+                if match:
+                    stat.db_queries += int(match.group(1))
+                    stat.db_ms += float(match.group(2))
+            if args.think_ms:
+                time.sleep(rng.expovariate(1000 / args.think_ms))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(args.seed + i,)) for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    report = {'duration_s': round(elapsed, 1), 'concurrency': args.concurrency, 'endpoints': {}}
+    for name, stat in stats.items():
+        latencies = sorted(stat.latencies)
+        count = len(latencies)
+        report['endpoints'][name] = {
+            'requests': count,
+            'errors': stat.errors,
+            'throughput_rps': round(count / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+            'db_queries_per_request': round(stat.db_queries / count, 2) if count else 0.0,
+            'db_ms_per_request': round(stat.db_ms / count, 2) if count else 0.0,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{'endpoint':<15}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p99 ms':>9}{'db q/req':>10}{'db ms/req':>11}")
+    for name, e in report['endpoints'].items():
+        print(f"{name:<15}{e['requests']:>10}{e['errors']:>8}{e['throughput_rps']:>9}{e['p50_ms']:>9}"
+              f"{e['p99_ms']:>9}{e['db_queries_per_request']:>10}{e['db_ms_per_request']:>11}")
+
+
+def compare(report, baseline, max_regression):
+    failures = []
+    for name, base in baseline['endpoints'].items():
+        current = report['endpoints'].get(name)
+        if current is None or not base['requests']:
+            continue
+        if current['p99_ms'] > base['p99_ms'] * (1 + max_regression):
+            failures.append(f"{name}: p99 {current['p99_ms']}ms vs baseline {base['p99_ms']}ms")
+        if current['throughput_rps'] < base['throughput_rps'] * (1 - max_regression):
+            failures.append(f"{name}: {current['throughput_rps']} rps vs baseline {base['throughput_rps']} rps")
+        if current['errors'] > base['errors']:
+            failures.append(f"{name}: {current['errors']} errors vs baseline {base['errors']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an exam-day traffic mix against a running quiz API.")
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--users', type=int, default=10000, help="number of bench users seeded by bench/seed.py")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help="seconds")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="endpoint=weight pairs, e.g. " + DEFAULT_MIX)
+    parser.add_argument('--think-ms', type=float, default=0, help="mean pause between requests per virtual user")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help="write the JSON report here")
+    parser.add_argument('--baseline', help="fail if this run regresses against the given report")
+    parser.add_argument('--save-baseline', help="write this run as the new baseline")
+    parser.add_argument('--max-regression', type=float, default=0.15, help="allowed fraction, default 0.15")
+    args = parser.parse_args()
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = run(args)
+    print_report(report)
+    for path in filter(None, [args.out, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            failures = compare(report, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
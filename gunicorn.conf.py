@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# gunicorn 설정 (gunicorn은 작업 디렉터리의 gunicorn.conf.py를 자동으로 읽는다)
+#
+# 비밀번호 해시 작업 풀(app.py의 PasswordHasher)은 워커 프로세스마다 따로 있고, 대기 제한도 한 프로세스
+# 안의 요청 스레드끼리만 적용된다. sync 워커는 프로세스당 요청을 하나씩만 처리하므로 제한에 걸릴 일이
+# 없고 bcrypt 계산 동안 워커 전체가 막힌다. 그래서 gthread 워커를 쓰고, 해시를 기다릴 수 있는 요청 수
+# (HASH_WORKERS + HASH_QUEUE_SIZE)를 프로세스당 요청 스레드 수보다 작게 두어 나머지 스레드가 다른 요청을
+# 처리하도록 한다.
+#
+# 워커는 기동할 때 DB 작업을 하지 않으므로 배포마다 스키마 마이그레이션이 먼저 돌아야 한다
+# (안 하면 첫 요청부터 UndefinedTable로 500). 호스트 설정에 배포 전 명령을 둘 수 있으면
+#     flask --app app migrate
+# 를 등록하고 MIGRATE_ON_START=0 으로 둔다. 시작 명령이 'gunicorn app:app' 뿐인 호스트를 위해 기본값은
+# MIGRATE_ON_START=1 이고, 이때는 마스터가 워커를 띄우기 전에 같은 명령을 별도 프로세스로 실행한다
+# (advisory lock을 잡으므로 여러 인스턴스가 동시에 떠도 한 번만 적용된다). 실패하면 gunicorn이 뜨지 않는다.
+#
+# 퀴즈 세션은 기본적으로 Postgres의 quiz_sessions 테이블(REDIS_URL이 있으면 Redis)에 두어 모든 워커가 함께 본다.
+# QUIZ_SESSION_STORE=memory는 워커가 하나일 때만 쓴다.
+import os
+import subprocess
+import sys
+
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+# app.py와 같은 기본값
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS', '2'))
+HASH_QUEUE_SIZE = int(os.environ.get('HASH_QUEUE_SIZE', '2'))
+
+MIGRATE_ON_START = os.environ.get('MIGRATE_ON_START', '1') == '1'
+
+
+def on_starting(server):
+    cfg = server.cfg
+    hash_capacity = HASH_WORKERS + HASH_QUEUE_SIZE
+    if cfg.worker_class_str not in ('gthread', 'gevent', 'eventlet'):
+        server.log.warning("worker class %s handles one request per process; bcrypt backpressure "
+                           "(HASH_QUEUE_SIZE) will never trigger. Use gthread.", cfg.worker_class_str)
+    elif cfg.worker_class_str == 'gthread' and hash_capacity >= cfg.threads:
+        server.log.warning("HASH_WORKERS + HASH_QUEUE_SIZE (%d) >= threads (%d); logins can occupy every "
+                           "request thread. Lower HASH_QUEUE_SIZE or raise GUNICORN_THREADS.", hash_capacity, cfg.threads)
+    # 요청 스레드마다 DB 커넥션이 필요하므로 풀 크기를 스레드 수에 맞춘다 (워커는 이 환경 변수를 물려받는다)
+    if 'DB_POOL_MAX' not in os.environ:
+        os.environ['DB_POOL_MAX'] = str(cfg.threads)
+    elif int(os.environ['DB_POOL_MAX']) < cfg.threads:
+        server.log.warning("DB_POOL_MAX (%s) < threads (%d); busy requests will wait for a connection and "
+                           "return 503 after DB_POOL_TIMEOUT.", os.environ['DB_POOL_MAX'], cfg.threads)
+    server.log.info("database: up to %d connections across %d workers",
+                    int(os.environ['DB_POOL_MAX']) * cfg.workers, cfg.workers)
+    if cfg.workers > 1 and os.environ.get('QUIZ_SESSION_STORE') == 'memory':
+        # 메모리 저장소는 워커마다 따로라서 다른 워커로 간 요청에서는 세션이 보이지 않는다
+        server.log.warning("QUIZ_SESSION_STORE=memory with %d workers: each worker sees only its own quiz sessions. "
+                           "Unset it to use the shared Postgres store.", cfg.workers)
+    server.log.info("bcrypt: %d hash threads, at most %d login/signup requests in flight across %d workers",
+                    HASH_WORKERS * cfg.workers, hash_capacity * cfg.workers, cfg.workers)
+    if MIGRATE_ON_START:
+        # 마스터에서 app을 import하면 풀과 스레드가 fork로 워커에 넘어가므로 별도 프로세스에서 실행한다
+        server.log.info("running 'flask --app app migrate' before starting workers (MIGRATE_ON_START=0 to skip)")
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'migrate'], cwd=cfg.chdir, check=True)
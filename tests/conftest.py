@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# 테스트는 DB 없이 돈다 (app을 임포트해도 DB에 연결하지 않음)
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+class Row(list):
+    # psycopg2의 DictRow처럼 위치와 이름 모두로 읽을 수 있고, 튜플처럼 풀어 쓸 수도 있다
+    def __init__(self, values):
+        super().__init__(values.values())
+        self._keys = list(values)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._keys.index(key)
+        return super().__getitem__(key)
+
+    def keys(self):
+        return list(self._keys)
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self._db = db
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        query = ' '.join(query.split())
+        self._db.queries.append((query, params))
+        for pattern, handler in self._db.handlers:
+            if pattern in query:
+                result = handler(params) if callable(handler) else handler
+                self._rows = [Row(r) for r in result or []]
+                return
+        self._rows = []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeDB:
+    # 쿼리에 pattern이 들어 있으면 handler(params)의 결과(dict 목록)를 돌려준다. 나중에 등록한 것이 우선
+    def __init__(self):
+        self.handlers = []
+        self.queries = []
+
+    def on(self, pattern, result):
+        self.handlers.insert(0, (pattern, result))
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def count(self, pattern):
+        return sum(pattern in query for query, _ in self.queries)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDB()
+
+    @contextmanager
+    def connection():
+        yield db
+
+    monkeypatch.setattr(app, 'get_db_connection', connection)
+    return db
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+import pytest
+
+import app
+
+NOW = datetime(2026, 3, 1, 9, 0)
+QUESTIONS = [{'id': n, 'question': f'Q{n}', 'options': ['a', 'b'], 'topic': 'lift' if n < 3 else 'drag'} for n in range(1, 6)]
+
+
+def test_due_questions_come_before_new_and_new_before_scheduled():
+    overdue = app._adaptive_priority((3, 1, NOW - timedelta(hours=5)), 0.5, NOW)
+    new = app._adaptive_priority(None, 0.5, NOW)
+    scheduled = app._adaptive_priority((3, 3, NOW + timedelta(days=3)), 0.5, NOW)
+    assert overdue > new > scheduled
+
+
+@pytest.fixture
+def client(monkeypatch, fake_db):
+    monkeypatch.setattr(app.question_cache, 'get_part', lambda name: {'questions': QUESTIONS} if name == 'P1' else None)
+    fake_db.on('FROM user_question_state', [
+        {'question_id': 4, 'attempts': 2, 'correct': 0, 'due_at': datetime.now() - timedelta(hours=1)},
+        {'question_id': 1, 'attempts': 5, 'correct': 5, 'due_at': datetime.now() + timedelta(days=20)},
+    ])
+    fake_db.on('FROM user_topic_stats', [{'topic': 'drag', 'correct': 1, 'total': 10}])
+    return app.app.test_client()
+
+
+def test_adaptive_quiz_picks_due_and_unseen_questions(client):
+    picked = client.post('/get-adaptive-quiz', json={'user': 'a@x', 'part': 'P1', 'count': 3}).json
+    assert picked[0]['id'] == 4
+    assert 1 not in [q['id'] for q in picked]
+    assert all(q['part'] == 'P1' for q in picked)
+
+
+@pytest.mark.parametrize('payload', [
+    {'user': ['a@x'], 'part': 'P1'},
+    {'user': 'a@x', 'parts': 'P1'},
+    {'user': 'a@x', 'parts': [1]},
+    {'user': 'a@x', 'part': 'P1', 'count': 'many'},
+])
+def test_malformed_requests_return_400(client, payload):
+    assert client.post('/get-adaptive-quiz', json=payload).status_code == 400
+
+
+def test_older_replayed_attempts_do_not_move_the_schedule(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, 'execute_values', lambda cursor, sql, values, **kwargs: calls.append(sql))
+    app.update_question_state(None, [('a@x', NOW, 1, 1, 'P1', None, [[1, True]])])
+    sql = ' '.join(calls[0].split())
+    assert "due_at = CASE WHEN EXCLUDED.last_seen >= user_question_state.last_seen" in sql
+    assert "last_seen = GREATEST(user_question_state.last_seen, EXCLUDED.last_seen)" in sql
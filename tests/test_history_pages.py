@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+import pytest
+
+import app
+
+START = datetime(2026, 3, 1, 9, 0)
+# 같은 시각에 저장된 기록도 id로 순서가 정해져야 한다
+HISTORY = [{'id': n + 1, 'user_email': 'a@x', 'date': START + timedelta(minutes=n // 2), 'score': n, 'total': 10,
+            'part': 'Part 1'} for n in range(7)]
+
+
+@pytest.fixture
+def client(fake_db):
+    def page(params):
+        rows = sorted(HISTORY, key=lambda r: (r['date'], r['id']), reverse=True)
+        if len(params) == 4:
+            _, date, row_id, limit = params
+            rows = [r for r in rows if (r['date'], r['id']) < (date, row_id)]
+        return rows[:params[-1]]
+
+    fake_db.on('FROM quiz_history WHERE user_email', page)
+    return app.app.test_client()
+
+
+def test_pages_follow_cursor_without_gaps_or_repeats(client):
+    seen, cursor = [], None
+    while True:
+        body = client.post('/get-history', json={'user': 'a@x', 'limit': 3, 'cursor': cursor}).json
+        seen += [item['id'] for item in body['items']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_cursor_round_trip():
+    assert app.decode_history_cursor(app.encode_history_cursor(START, 42)) == (START, 42)
+    assert app.decode_history_cursor(None) is None
+
+
+@pytest.mark.parametrize('cursor', ['not-base64!', 'bm9waXBl', 12345, ['x']])
+def test_bad_cursor_returns_400(client, cursor):
+    assert client.post('/get-history', json={'user': 'a@x', 'cursor': cursor}).status_code == 400
+
+
+def test_limit_is_clamped(client, fake_db):
+    client.post('/get-history', json={'user': 'a@x', 'limit': 10000})
+    assert fake_db.queries[-1][1][-1] == app.HISTORY_PAGE_MAX + 1
+
+
+@pytest.mark.parametrize('path', ['/get-history', '/get-history-summary'])
+@pytest.mark.parametrize('user', [None, '', ['a@x'], {'email': 'a@x'}])
+def test_missing_or_non_string_user_returns_400(client, fake_db, path, user):
+    assert client.post(path, json={'user': user}).status_code == 400
+    assert fake_db.queries == []
+
+
+def test_part_stats_upsert_is_sorted_and_newest_first(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, 'execute_values', lambda cursor, sql, values, **kwargs: calls.append(values))
+    rows = [('b@x', START, 5, 10, 'Part 1', None, None),
+            ('a@x', START, 2, 10, 'Part 2', None, None),
+            ('a@x', START + timedelta(days=1), 8, 10, 'Part 2', None, None)]
+    app.update_user_part_stats(None, rows)
+    values = calls[0]
+    assert [(v[0], v[1]) for v in values] == [('a@x', 'Part 2'), ('b@x', 'Part 1')]
+    assert values[0][9] == [80.0, 20.0]
+    assert values[0][10] == [START + timedelta(days=1), START]
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+from datetime import datetime
+
+import psycopg2
+import pytest
+
+import app
+
+NOW = datetime(2026, 3, 1, 9, 30)
+
+
+def row(email, score=1):
+    return (email, NOW, score, 2, 'Part 1', {'topic': [score, 2]}, [[1, True]])
+
+
+class FakeDB:
+    def __init__(self):
+        self.rows = []
+        self.batches = []
+        self.down = False
+        self.fail_after = None  # 이 횟수만큼 성공한 뒤 DB가 내려간다
+
+    def insert(self, rows):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            self.down = True
+        if self.down:
+            raise psycopg2.OperationalError("database is down")
+        # 실제 DB처럼 배치 안에 잘못된 행이 하나라도 있으면 배치 전체가 실패
+        if any(not isinstance(r[0], str) for r in rows):
+            raise TypeError("bad row")
+        self.rows.extend(rows)
+        self.batches.append(len(rows))
+
+
+@pytest.fixture
+def db():
+    return FakeDB()
+
+
+@pytest.fixture
+def writer(tmp_path, db):
+    w = app.HistoryWriter(10, 0.01, 100, str(tmp_path / 'spill.jsonl'), str(tmp_path / 'rejected.jsonl'))
+    w._insert = db.insert
+    return w
+
+
+def read_lines(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def test_unavailable_database_spills_and_replays(writer, db):
+    db.down = True
+    assert writer._write([row('a@x'), row('b@x')]) is False
+    assert len(read_lines(writer._spill_path)) == 2
+
+    db.down = False
+    writer._replay_spill()
+    assert [r[0] for r in db.rows] == ['a@x', 'b@x']
+    assert db.rows[0][1] == NOW
+    assert read_lines(writer._spill_path) == []
+    assert writer.stats()['spill_pending'] is False
+
+
+def test_replay_keeps_rows_while_database_is_down(writer, db):
+    db.down = True
+    writer._write([row('a@x')])
+    writer._replay_spill()
+    assert db.rows == []
+    assert writer.stats()['spill_pending'] is True
+
+    db.down = False
+    writer._replay_spill()
+    assert [r[0] for r in db.rows] == ['a@x']
+    assert writer.stats()['spill_pending'] is False
+
+
+def test_replay_runs_in_batches_and_resumes_after_outage(tmp_path, db):
+    writer = app.HistoryWriter(2, 0.01, 100, str(tmp_path / 'spill.jsonl'), str(tmp_path / 'rejected.jsonl'))
+    writer._insert = db.insert
+    writer._spill([row(f'{n}@x') for n in range(5)])
+
+    db.fail_after = 1
+    writer._replay_spill()
+    assert db.batches == [2]
+
+    db.fail_after, db.down = None, False
+    writer._spill([row('late@x')])  # replay 도중 새로 내려 쓴 행은 다음 replay에서 처리
+    writer._replay_spill()
+    writer._replay_spill()
+    assert db.batches == [2, 2, 1, 1]
+    assert sorted(r[0] for r in db.rows) == sorted([f'{n}@x' for n in range(5)] + ['late@x'])
+    assert not (tmp_path / 'spill.jsonl.replay').exists()
+    assert writer.stats()['spill_pending'] is False
+
+
+def test_bad_row_is_quarantined_without_blocking_batch(writer, db):
+    assert writer._write([row('a@x'), row(123), row('b@x')]) is True
+    assert [r[0] for r in db.rows] == ['a@x', 'b@x']
+    assert json.loads(read_lines(writer._quarantine_path)[0])[0] == 123
+    assert writer.stats()['quarantined'] == 1
+
+
+def test_unreadable_spill_line_is_quarantined(writer, db):
+    with open(writer._spill_path, 'w', encoding='utf-8') as f:
+        f.write(writer._spill_line(row('a@x')))
+        f.write('["torn", "2026-\n')
+        f.write(json.dumps(['old@x', NOW.isoformat(), 1, 2, 'Part 1']) + '\n')  # 주제 결과가 없던 예전 형식
+    writer._spill_pending = True
+    writer._replay_spill()
+    assert [r[0] for r in db.rows] == ['a@x', 'old@x']
+    assert db.rows[1][5:] == (None, None)
+    assert read_lines(writer._quarantine_path) == ['["torn", "2026-']
+    assert read_lines(writer._spill_path) == []
+
+
+def test_missing_topic_results_are_stored_as_sql_null(monkeypatch, fake_db):
+    batches = []
+    monkeypatch.setattr(app, 'execute_values', lambda cursor, sql, values, **kwargs: batches.append((sql, values)))
+    writer = app.HistoryWriter(10, 0.01, 100, '/nonexistent/spill', '/nonexistent/rejected')
+    writer._insert([('a@x', NOW, 1, 2, 'Part 1', None, None), row('b@x')])
+    history = next(values for sql, values in batches if 'INTO quiz_history' in sql)
+    assert history[0][5] is None
+    assert history[1][5].adapted == {'topic': [1, 2]}
+
+
+def test_writer_thread_survives_unexpected_errors(writer, monkeypatch):
+    calls = []
+
+    def fail(rows):
+        calls.append(rows)
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(writer, '_write', fail)
+    writer.submit('a@x', NOW, 1, 2, 'Part 1')
+    deadline = time.monotonic() + 2
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert calls
+    assert writer._thread.is_alive()
+    monkeypatch.setattr(writer, '_write', lambda rows: True)
+    writer.close()
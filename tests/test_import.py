@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+
+import app
+
+
+def valid(**overrides):
+    raw = {'part': ' Part 1 ', 'question': 'Q?', 'options': ['a', 'b', 'c'], 'answer': '1', 'topic': 'lift'}
+    raw.update(overrides)
+    return raw
+
+
+def test_valid_question_is_normalized():
+    q = app._validate_question(valid(display_order='3', explanation=''), 1)
+    assert q == {
+        'key': app.question_key('Part 1', 'Q?'), 'part': 'Part 1', 'question': 'Q?',
+        'options': ['a', 'b', 'c'], 'answer': 1, 'topic': 'lift', 'explanation': None, 'display_order': 3,
+    }
+
+
+def test_options_may_be_a_json_string():
+    assert app._validate_question(valid(options='["x", "y"]', answer=0), 1)['options'] == ['x', 'y']
+
+
+def test_explicit_key_is_kept():
+    assert app._validate_question(valid(key=' k-1 '), 1)['key'] == 'k-1'
+
+
+@pytest.mark.parametrize('raw, message', [
+    (None, 'not a JSON object'),
+    (valid(topic=''), 'required'),
+    (valid(options='[oops'), 'JSON array'),
+    (valid(options=['only one']), 'at least two'),
+    (valid(options=['a', ' ']), 'at least two'),
+    (valid(answer='x'), 'option index'),
+    (valid(answer=3), 'out of range'),
+    (valid(display_order='first'), 'display_order'),
+    (valid(part=7), 'part must be a string'),
+    (valid(question=['Q?']), 'question must be a string'),
+    (valid(topic={'name': 'lift'}), 'topic must be a string'),
+    (valid(key=12), 'key must be a string'),
+    (valid(answer=True), 'option index'),
+    (valid(answer=1.5), 'option index'),
+    (valid(display_order=False), 'display_order'),
+])
+def test_invalid_question_reports_line(raw, message):
+    with pytest.raises(app.QuestionImportError, match=rf"line 7: .*{message}"):
+        app._validate_question(raw, 7)
+
+
+def test_jsonl_reader_yields_unparseable_lines_for_validation():
+    stream = io.StringIO('{"part": "P"}\n\nnot json\n')
+    assert list(app.read_question_file(stream, 'jsonl')) == [(1, {'part': 'P'}), (3, None)]
+
+
+def test_skip_invalid_reports_non_string_fields(monkeypatch, fake_db):
+    monkeypatch.setattr(app, 'execute_values', lambda cursor, sql, values, **kwargs: [(True,)] * len(values))
+    fake_db.on('SELECT id, name FROM parts', [{'id': 1, 'name': 'Part 1'}])
+    records = [(1, valid(part=['Part 1'])), (2, valid(answer=False)), (3, valid())]
+    summary = app.import_questions(records, skip_invalid=True)
+    assert summary['inserted'] == 1 and summary['skipped'] == 2
+    assert [e.split(':')[0] for e in summary['errors']] == ['line 1', 'line 2']
+
+
+@pytest.fixture
+def flushed(monkeypatch):
+    calls = []
+
+    def fake_execute_values(cursor, sql, values, **kwargs):
+        calls.append(values)
+        return [(False,)] * len(values)
+
+    monkeypatch.setattr(app, 'execute_values', fake_execute_values)
+    return calls
+
+
+def test_question_moved_to_another_part_is_appended(flushed):
+    part_ids = {'Part 1': 1, 'Part 2': 2}
+    orders = {'k-1': (1, 1), 'k-2': (1, 2), 'k-3': (2, 1)}
+    next_order, explicit_parts = {1: 3, 2: 2}, set()
+    moved = app._validate_question(valid(key='k-1', part='Part 2'), 1)
+    kept = app._validate_question(valid(key='k-2'), 2)
+    app._flush_import_batch(None, {'k-1': moved, 'k-2': kept}, part_ids, orders, next_order, explicit_parts)
+    # (part_id, ..., display_order, key)
+    assert [(v[0], v[6], v[7]) for v in flushed[-1]] == [(2, 2, 'k-1'), (1, 2, 'k-2')]
+    assert orders['k-1'] == (2, 2) and next_order == {1: 3, 2: 3}
+    assert explicit_parts == set()
+
+
+def test_explicit_order_marks_part_for_renumbering(monkeypatch, fake_db):
+    monkeypatch.setattr(app, 'execute_values', lambda cursor, sql, values, **kwargs: [(True,)] * len(values))
+    fake_db.on('SELECT id, name FROM parts', [{'id': 1, 'name': 'Part 1'}, {'id': 2, 'name': 'Part 2'}])
+    app.import_questions([(1, valid(display_order=1)), (2, valid(part='Part 2', question='Q2'))])
+    assert fake_db.count('ROW_NUMBER() OVER') == 1
+    assert fake_db.queries[-1][1] == ([1],)
+
+    app.import_questions([(1, valid(part='Part 2', question='Q3'))])
+    assert fake_db.count('ROW_NUMBER() OVER') == 1
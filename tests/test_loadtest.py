@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import loadtest  # noqa: E402
+
+
+def endpoint(p99_ms=10.0, rps=100.0, errors=0, requests=1000):
+    return {'requests': requests, 'errors': errors, 'throughput_rps': rps, 'p99_ms': p99_ms}
+
+
+def test_parse_mix():
+    assert loadtest.parse_mix('login=1, submit-quiz=2.5') == {'login': 1.0, 'submit-quiz': 2.5}
+    with pytest.raises(ValueError, match='unknown endpoints in mix: nope'):
+        loadtest.parse_mix('login=1,nope=2')
+
+
+def test_percentile():
+    values = sorted(range(1, 101))
+    assert loadtest.percentile(values, 50) == 51
+    assert loadtest.percentile(values, 99) == 99
+    assert loadtest.percentile([], 99) == 0.0
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {'endpoints': {'login': endpoint(), 'parts': endpoint(), 'unused': endpoint(requests=0)}}
+    report = {'endpoints': {
+        'login': endpoint(p99_ms=10.9, rps=91.0),
+        'parts': endpoint(p99_ms=12.0, rps=80.0, errors=1),
+        'unused': endpoint(p99_ms=999.0),
+    }}
+    failures = loadtest.compare(report, baseline, max_regression=0.1)
+    assert [f.split(':')[0] for f in failures] == ['parts'] * 3
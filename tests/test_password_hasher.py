@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def busy_hasher(monkeypatch):
+    # 작업 스레드 1개, 대기열 0: 하나만 실행 중이어도 다음 요청은 바로 거절된다
+    hasher = app.PasswordHasher(1, 0, 4, 0)
+    monkeypatch.setattr(app, 'password_hasher', hasher)
+    release = threading.Event()
+    running = hasher._submit(release.wait)
+    yield hasher
+    release.set()
+    running.result(timeout=2)
+
+
+def test_full_hasher_raises_busy(busy_hasher):
+    with pytest.raises(app.HashingBusy):
+        busy_hasher.hash('secret')
+
+
+def test_busy_hasher_returns_503_with_retry_after(busy_hasher):
+    response = app.app.test_client().post('/signup', json={'email': 'a@x', 'password': 'secret'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.HASH_RETRY_AFTER)
+
+
+def test_slot_is_released_after_hashing():
+    hasher = app.PasswordHasher(1, 0, 4, 0)
+    password_hash = hasher.hash('secret')
+    assert hasher.check('secret', password_hash)
+    assert not hasher.check('wrong', password_hash)
+
+
+def test_needs_rehash_when_cost_differs():
+    hasher = app.PasswordHasher(1, 0, 5, 0)
+    assert hasher.needs_rehash(app.bcrypt.hashpw(b'x', app.bcrypt.gensalt(4)).decode())
+    assert not hasher.needs_rehash(hasher.hash('x'))
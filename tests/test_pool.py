@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import psycopg2.extensions
+import pytest
+
+import app
+
+
+class FakeInfo:
+    transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.info = FakeInfo()
+        self.created_at = self.last_used_at = time.monotonic()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    conns = []
+
+    def connect(pool):
+        conn = FakeConn()
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr(app.ConnectionPool, '_connect', connect)
+    monkeypatch.setattr(app, 'DB_POOL_TIMEOUT', 0.05)
+    return conns
+
+
+def test_returned_connection_is_reused(opened):
+    pool = app.ConnectionPool('dsn', 0, 2)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert len(opened) == 1
+    assert pool.stats()['size'] == 1
+
+
+def test_timeout_when_pool_is_exhausted(opened):
+    pool = app.ConnectionPool('dsn', 0, 2)
+    pool.getconn(), pool.getconn()
+    with pytest.raises(app.PoolTimeout):
+        pool.getconn()
+    assert pool.stats() == {'size': 2, 'idle': 0, 'in_use': 2, 'min': 0, 'max': 2}
+
+
+def test_failed_connect_releases_slot(monkeypatch, opened):
+    pool = app.ConnectionPool('dsn', 0, 1)
+
+    def refuse(pool):
+        raise psycopg2.OperationalError("refused")
+
+    with monkeypatch.context() as m:
+        m.setattr(app.ConnectionPool, '_connect', refuse)
+        with pytest.raises(psycopg2.OperationalError):
+            pool.getconn()
+    assert pool.stats()['size'] == 0
+    pool.getconn()
+    assert pool.stats()['size'] == 1
+
+
+def test_broken_connection_is_closed_and_slot_freed(opened):
+    pool = app.ConnectionPool('dsn', 0, 1)
+    conn = pool.getconn()
+    pool.putconn(conn, broken=True)
+    assert conn.closed
+    assert pool.stats()['size'] == 0
+    assert pool.getconn() is not conn
+
+
+def test_expired_connections_are_closed(monkeypatch, opened):
+    pool = app.ConnectionPool('dsn', 0, 2)
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+    monkeypatch.setattr(app, 'DB_POOL_MAX_LIFETIME', 0)
+    time.sleep(0.01)
+    conn = pool.getconn()
+    assert first.closed and second.closed
+    assert conn not in (first, second)
+    assert pool.stats()['size'] == 1
+
+
+def test_waiter_gets_connection_when_one_is_returned(monkeypatch, opened):
+    monkeypatch.setattr(app, 'DB_POOL_TIMEOUT', 5)
+    pool = app.ConnectionPool('dsn', 0, 1)
+    conn = pool.getconn()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    time.sleep(0.05)
+    pool.putconn(conn)
+    waiter.join(timeout=2)
+    assert got == [conn]
+    assert pool.stats()['size'] == 1
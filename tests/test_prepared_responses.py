@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+
+import pytest
+
+import app
+
+QUESTIONS = [{'id': n, 'question': f'질문 {n}', 'options': ['가', '나', '다', '라']} for n in range(50)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    payload = app.prepare_json_payload(QUESTIONS)
+    monkeypatch.setattr(app.question_cache, 'get_part', lambda name: {'response': payload} if name == 'P1' else None)
+    return app.app.test_client()
+
+
+def test_matching_etag_returns_304(client):
+    first = client.get('/get-questions?part=P1')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    again = client.get('/get-questions?part=P1', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_identity_when_client_does_not_accept_compression(client):
+    response = client.get('/get-questions?part=P1', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(response.data) == QUESTIONS
+
+
+def test_gzip_when_brotli_is_not_accepted(client):
+    response = client.get('/get-questions?part=P1', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == QUESTIONS
+
+
+@pytest.mark.skipif(app.brotli is None, reason="brotli not installed")
+def test_brotli_is_preferred(client):
+    response = client.get('/get-questions?part=P1', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(app.brotli.decompress(response.data)) == QUESTIONS
+
+
+def test_small_payloads_are_not_compressed():
+    assert app.prepare_json_payload([1])['encodings'] == {}
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def bank(fake_db):
+    bank = {'version': 1, 'parts': {'P1': 1, 'P2': 2}}
+    fake_db.on('FROM bank_version', lambda params: [{'version': bank['version']}])
+    fake_db.on('SELECT id FROM parts WHERE name', lambda params: [{'id': bank['parts'][params[0]]}] if params[0] in bank['parts'] else [])
+    fake_db.on('FROM questions WHERE part_id', lambda params: [{
+        'id': params[0] * 10, 'part_id': params[0], 'question': f"Q{bank['version']}",
+        'options': json.dumps(['a', 'b']), 'answer': 1, 'topic': 't', 'explanation': None, 'display_order': 1,
+    }])
+    return bank
+
+
+def loads(fake_db):
+    return fake_db.count('FROM questions WHERE part_id')
+
+
+def test_part_is_served_from_cache_until_bank_version_changes(fake_db, bank):
+    cache = app.QuestionBankCache(4, 0)
+    first = cache.get_part('P1')
+    assert cache.get_part('P1') is first
+    assert loads(fake_db) == 1
+    assert first['answer_key'][10] == {'answer': 1, 'correct_text': 'b', 'topic': 't'}
+
+    bank['version'] = 2
+    assert cache.get_part('P1')['questions'][0]['question'] == 'Q2'
+    assert loads(fake_db) == 2
+
+
+def test_least_recently_used_part_is_evicted(fake_db, bank):
+    cache = app.QuestionBankCache(1, 0)
+    cache.get_part('P1')
+    cache.get_part('P2')
+    cache.get_part('P1')
+    assert loads(fake_db) == 3
+    assert cache.stats()['parts'] == 1
+
+
+def test_unknown_parts_do_not_evict_cached_parts(fake_db, bank):
+    cache = app.QuestionBankCache(1, 0)
+    cache.get_part('P1')
+    for n in range(5):
+        assert cache.get_part(f'nope-{n}') is None
+    cache.get_part('P1')
+    assert loads(fake_db) == 1
+    assert cache.stats()['parts'] == 1
+
+
+def test_internal_columns_are_not_selected(fake_db, bank):
+    app.QuestionBankCache(4, 0).get_part('P1')
+    query = next(q for q, _ in fake_db.queries if 'FROM questions' in q)
+    assert 'question_key' not in query and '*' not in query
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import os
+import runpy
+import types
+
+import psycopg2
+import pytest
+
+import app
+
+VERSION_QUERY = 'FROM schema_migrations'
+
+
+def raise_(error):
+    def handler(params):
+        raise error
+    return handler
+
+
+@pytest.fixture
+def client(fake_db):
+    return app.app.test_client()
+
+
+def test_ready_at_current_schema(client, fake_db):
+    fake_db.on(VERSION_QUERY, [{'version': app.SCHEMA_VERSION}])
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.json['ready'] is True and response.json['schema_version'] == app.SCHEMA_VERSION
+
+
+def test_pending_migrations_return_503(client, fake_db):
+    fake_db.on(VERSION_QUERY, [{'version': app.SCHEMA_VERSION - 1}])
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json['reason'] == 'migrations pending'
+    assert response.json['expected'] == app.SCHEMA_VERSION
+
+
+def test_never_migrated_database_is_pending(client, fake_db):
+    fake_db.on(VERSION_QUERY, raise_(psycopg2.errors.UndefinedTable('relation "schema_migrations" does not exist')))
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json['schema_version'] == 0
+
+
+@pytest.mark.parametrize('error', [psycopg2.OperationalError('connection refused'), app.PoolTimeout('busy')])
+def test_database_unavailable_returns_503(client, fake_db, error):
+    fake_db.on(VERSION_QUERY, raise_(error))
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json['reason'] == 'database unavailable'
+
+
+@pytest.mark.parametrize('setting, expected_runs', [('1', 1), ('0', 0)])
+def test_gunicorn_runs_migrate_before_workers(monkeypatch, setting, expected_runs):
+    monkeypatch.setenv('MIGRATE_ON_START', setting)
+    monkeypatch.setenv('DB_POOL_MAX', '8')
+    runs = []
+    monkeypatch.setattr('subprocess.run', lambda args, **kwargs: runs.append((args, kwargs)))
+    config = runpy.run_path(os.path.join(os.path.dirname(app.__file__), 'gunicorn.conf.py'))
+    log = types.SimpleNamespace(info=lambda *a: None, warning=lambda *a: None)
+    cfg = types.SimpleNamespace(worker_class_str='gthread', threads=8, workers=2, chdir='/srv/quiz')
+    config['on_starting'](types.SimpleNamespace(cfg=cfg, log=log))
+    assert len(runs) == expected_runs
+    if runs:
+        args, kwargs = runs[0]
+        assert args[-3:] == ['--app', 'app', 'migrate']
+        assert kwargs['cwd'] == '/srv/quiz' and kwargs['check'] is True
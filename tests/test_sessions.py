@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import app
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(app.time, 'monotonic', clock)
+    return clock
+
+
+def test_answers_are_saved_by_position(clock):
+    store = app.MemorySessionStore(60, 10)
+    store.create('s1', {'user': 'a@x'}, 3)
+    assert store.set_answer('s1', 1, 2)
+    assert store.set_answer('s1', 1, 2)
+    assert store.get('s1') == ({'user': 'a@x'}, bytes([app.UNANSWERED, 2, app.UNANSWERED]), None)
+    assert not store.set_answer('s2', 0, 0)
+
+
+def test_first_finish_wins_and_locks_answers(clock):
+    store = app.MemorySessionStore(60, 10)
+    store.create('s1', {}, 1)
+    assert store.finish('s1', {'score': 1}) == ({'score': 1}, True)
+    assert store.finish('s1', {'score': 0}) == ({'score': 1}, False)
+    assert not store.set_answer('s1', 0, 0)
+    assert store.get('s1')[2] == {'score': 1}
+    assert store.finish('missing', {'score': 0}) == (None, False)
+
+
+def test_sessions_expire_after_inactivity(clock):
+    store = app.MemorySessionStore(60, 10)
+    store.create('s1', {}, 1)
+    clock.now += 50
+    assert store.set_answer('s1', 0, 1)  # 저장할 때마다 만료 시각이 밀린다
+    clock.now += 50
+    assert store.get('s1') is not None
+    clock.now += 61
+    assert store.get('s1') is None
+
+
+def test_least_recently_used_session_is_evicted(clock):
+    store = app.MemorySessionStore(60, 2)
+    store.create('s1', {}, 1)
+    store.create('s2', {}, 1)
+    store.get('s1')
+    store.create('s3', {}, 1)
+    assert store.get('s2') is None
+    assert store.get('s1') is not None and store.get('s3') is not None
+
+
+QUESTIONS = [
+    {'id': 11, 'question': 'Q1', 'options': ['a', 'b', 'c'], 'answer': 1, 'topic': 'lift'},
+    {'id': 12, 'question': 'Q2', 'options': ['x', 'y'], 'answer': 0, 'topic': 'drag'},
+]
+
+
+@pytest.fixture
+def bank():
+    return {'Part 1': {'questions': QUESTIONS, 'answer_key': app.build_answer_key(QUESTIONS)}}
+
+
+@pytest.fixture
+def client(monkeypatch, bank):
+    monkeypatch.setattr(app, '_session_store', app.MemorySessionStore(60, 100))
+    monkeypatch.setattr(app.question_cache, 'get_part', bank.get)
+    submitted = []
+    monkeypatch.setattr(app.history_writer, 'submit', lambda *row: submitted.append(row))
+    client = app.app.test_client()
+    client.submitted = submitted
+    return client
+
+
+def start(client, user='a@x'):
+    response = client.post('/quiz-sessions', json={'user': user, 'part': 'Part 1'})
+    assert response.status_code == 201
+    return response.json['session_id']
+
+
+def test_session_round_trip(client):
+    session_id = start(client)
+    assert client.patch(f'/quiz-sessions/{session_id}', json={'user': 'a@x', 'questionId': 11, 'option': 1}).status_code == 200
+    assert client.patch(f'/quiz-sessions/{session_id}', json={'user': 'a@x', 'questionId': 12, 'option': 1}).status_code == 200
+
+    resumed = client.get(f'/quiz-sessions/{session_id}?user=a@x').json
+    assert resumed['answers'] == {'11': 1, '12': 1}
+    assert [q['id'] for q in resumed['questions']] == [11, 12]
+
+    result = client.post(f'/quiz-sessions/{session_id}/finalize', json={'user': 'a@x'}).json
+    assert (result['score'], result['total']) == (1, 2)
+    assert result['results'][1] == {'questionId': 12, 'isCorrect': False, 'userAnswer': 'y', 'correctAnswer': 'x'}
+    email, _date, score, total, part, topics, question_results = client.submitted[0]
+    assert (email, score, total, part) == ('a@x', 1, 2, 'Part 1')
+    assert topics == {'lift': [1, 1], 'drag': [0, 1]}
+
+
+def test_finalize_is_idempotent(client):
+    session_id = start(client)
+    client.patch(f'/quiz-sessions/{session_id}', json={'user': 'a@x', 'questionId': 11, 'option': 1})
+    first = client.post(f'/quiz-sessions/{session_id}/finalize', json={'user': 'a@x'})
+    retry = client.post(f'/quiz-sessions/{session_id}/finalize', json={'user': 'a@x'})
+    assert retry.status_code == 200 and retry.json == first.json
+    assert len(client.submitted) == 1
+    assert client.get(f'/quiz-sessions/{session_id}?user=a@x').json['result'] == first.json
+    patch = client.patch(f'/quiz-sessions/{session_id}', json={'user': 'a@x', 'questionId': 12, 'option': 0})
+    assert patch.status_code == 409
+
+
+def test_finalize_grades_against_questions_at_start(client, bank):
+    session_id = start(client)
+    client.patch(f'/quiz-sessions/{session_id}', json={'user': 'a@x', 'questionId': 11, 'option': 1})
+    # 풀고 있는 도중에 문제를 다시 가져와 정답과 보기가 바뀌어도 시작할 때의 시험지로 채점한다
+    changed = [dict(QUESTIONS[0], options=['b', 'a'], answer=0), QUESTIONS[1]]
+    bank['Part 1'] = {'questions': changed, 'answer_key': app.build_answer_key(changed)}
+    assert client.get(f'/quiz-sessions/{session_id}?user=a@x').json['questions'][0]['options'] == ['a', 'b', 'c']
+    result = client.post(f'/quiz-sessions/{session_id}/finalize', json={'user': 'a@x'}).json
+    assert result['results'] == [{'questionId': 11, 'isCorrect': True, 'userAnswer': 'b', 'correctAnswer': 'b'}]
+
+
+def test_other_users_cannot_use_session(client):
+    session_id = start(client)
+    assert client.get(f'/quiz-sessions/{session_id}?user=b@x').status_code == 404
+    assert client.get(f'/quiz-sessions/{session_id}').status_code == 404
+    assert client.patch(f'/quiz-sessions/{session_id}', json={'user': 'b@x', 'questionId': 11, 'option': 0}).status_code == 404
+    assert client.post(f'/quiz-sessions/{session_id}/finalize', json={'user': 'b@x'}).status_code == 404
+    assert client.post(f'/quiz-sessions/{session_id}/finalize', json={'user': 'a@x'}).status_code == 200
+    assert client.submitted[0][0] == 'a@x'
+
+
+@pytest.mark.parametrize('payload', [
+    {'questionId': 99, 'option': 0},
+    {'questionId': 12, 'option': 2},
+    {'questionId': 12, 'option': -1},
+    {'questionId': 12, 'option': True},
+    {'questionId': 12, 'option': '0'},
+    {'questionId': True, 'option': 0},
+])
+def test_invalid_answers_are_rejected(client, payload):
+    session_id = start(client)
+    assert client.patch(f'/quiz-sessions/{session_id}', json={'user': 'a@x', **payload}).status_code == 400
+
+
+def test_start_rejects_non_string_user(client):
+    assert client.post('/quiz-sessions', json={'user': 123, 'part': 'Part 1'}).status_code == 400
+    assert client.post('/quiz-sessions', json={'user': 'a@x', 'part': 'Part 9'}).status_code == 404
+
+
+@pytest.mark.parametrize('setting, store_class', [
+    ('postgres', app.PostgresSessionStore), ('memory', app.MemorySessionStore),
+])
+def test_store_is_chosen_by_setting(monkeypatch, setting, store_class):
+    monkeypatch.setattr(app, '_session_store', None)
+    monkeypatch.setattr(app, 'QUIZ_SESSION_STORE', setting)
+    assert isinstance(app.get_session_store(), store_class)
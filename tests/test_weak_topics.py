@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import app
+
+COLUMNS = ['topic', 'correct', 'total', 'global_correct', 'global_total']
+ROWS = [
+    ('Weather', 8, 10, 60, 100),
+    ('Navigation', 3, 10, None, None),
+    ('Engines', 3, 20, 50, 100),
+]
+
+
+@pytest.fixture
+def client(fake_db):
+    fake_db.on('FROM user_topic_stats u', [dict(zip(COLUMNS, row)) for row in ROWS])
+    return app.app.test_client()
+
+
+def test_weakest_topics_first(client):
+    body = client.post('/get-weak-topics', json={'user': 'a@x', 'limit': 2}).json
+    assert [t['topic'] for t in body] == ['Engines', 'Navigation']
+    assert body[0]['accuracy'] == 15.0 and body[0]['global_accuracy'] == 50.0
+    assert body[1]['global_accuracy'] is None
+
+
+@pytest.mark.parametrize('payload', [{}, {'user': ['a@x']}, {'user': 'a@x', 'limit': 'many'}])
+def test_bad_request_returns_400(client, fake_db, payload):
+    assert client.post('/get-weak-topics', json=payload).status_code == 400
+    assert fake_db.queries == []